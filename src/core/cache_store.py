@@ -0,0 +1,196 @@
+"""
+Building blocks shared by the on-disk caches (TheMealDB responses, T5
+generations, image results).
+
+SQLiteLRU is a key -> value table with an optional tag per row (e.g. the
+model fingerprint a value was made with), the value's size in bytes and its
+created/accessed times. Once it holds more than `max_entries` rows or more
+than `max_bytes` of values, the least recently accessed rows are deleted.
+Hits do not write: their access times are collected in memory and written in
+one batch once TOUCH_BATCH of them are pending, TOUCH_INTERVAL seconds have
+passed, or before anything that depends on the order (eviction, deletes,
+close), so a read-heavy cache does not commit once per lookup.
+
+SharedCache holds the process-wide instance of a cache class behind the
+get/configure/stats functions each cache module exposes. If the cache cannot
+be opened (read-only data directory, SQLite error), it is disabled with one
+message and callers carry on uncached.
+"""
+import sqlite3
+import threading
+import time
+from typing import Callable, Optional, Tuple, Union
+
+COLUMNS = ("key", "tag", "value", "size", "created_at", "accessed_at")
+TOUCH_BATCH = 256
+TOUCH_INTERVAL = 5.0
+
+def _size(value: Union[bytes, str]) -> int:
+    return len(value.encode("utf-8")) if isinstance(value, str) else len(value)
+
+class SQLiteLRU:
+    def __init__(self, path: str, table: str, max_entries: Optional[int] = None, max_bytes: Optional[int] = None):
+        """
+        Args:
+            path (str): SQLite file
+            table (str): Table holding this cache's rows
+            max_entries (int): Rows kept before least recently used ones are evicted (None: no limit)
+            max_bytes (int): Total value bytes kept before least recently used rows are evicted (None: no limit)
+        """
+        self.path = path
+        self.table = table
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        columns = tuple(row[1] for row in self._conn.execute(f"PRAGMA table_info({table})"))
+        if columns and columns != COLUMNS:
+            # Written by an older layout; it is only a cache
+            self._conn.execute(f"DROP TABLE {table}")
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ("
+            " key TEXT PRIMARY KEY,"
+            " tag TEXT,"
+            " value BLOB,"
+            " size INTEGER NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_accessed ON {table}(accessed_at)")
+        self._conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_tag ON {table}(tag)")
+        self._conn.commit()
+        self._count, self._bytes = self._conn.execute(f"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM {table}").fetchone()
+        self.evictions = 0
+        self._touched = {}  # key -> accessed_at not yet written
+        self._last_flush = time.monotonic()
+
+    def get(self, key: str) -> Optional[Tuple[Union[bytes, str], float]]:
+        """(value, created_at) for key, or None. Marks the row as recently used."""
+        with self._lock:
+            row = self._conn.execute(f"SELECT value, created_at FROM {self.table} WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                self._touched[key] = time.time()
+                if len(self._touched) >= TOUCH_BATCH or time.monotonic() - self._last_flush >= TOUCH_INTERVAL:
+                    self._flush_touches()
+                    self._conn.commit()
+        return row
+
+    def _flush_touches(self):
+        if self._touched:
+            self._conn.executemany(f"UPDATE {self.table} SET accessed_at = ? WHERE key = ?",
+                                   [(at, key) for key, at in self._touched.items()])
+            self._touched.clear()
+        self._last_flush = time.monotonic()
+
+    def put(self, key: str, value: Union[bytes, str], tag: Optional[str] = None, created_at: Optional[float] = None):
+        now = time.time()
+        size = _size(value)
+        with self._lock:
+            self._touched.pop(key, None)
+            old = self._conn.execute(f"SELECT size FROM {self.table} WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, tag, value, size, created_at, accessed_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (key, tag, value, size, created_at or now, now),
+            )
+            if old is None:
+                self._count += 1
+            self._bytes += size - (old[0] if old else 0)
+            self._evict_over_budget()
+            self._conn.commit()
+
+    def _over_budget(self, count: int, total: int) -> bool:
+        return ((self.max_entries is not None and count > self.max_entries)
+                or (self.max_bytes is not None and total > self.max_bytes))
+
+    def _evict_over_budget(self):
+        if not self._over_budget(self._count, self._bytes):
+            return
+        self._flush_touches()
+        victims = []
+        count, total = self._count, self._bytes
+        for key, size in self._conn.execute(f"SELECT key, size FROM {self.table} ORDER BY accessed_at"):
+            if not self._over_budget(count, total):
+                break
+            victims.append((key,))
+            count -= 1
+            total -= size
+        self._conn.executemany(f"DELETE FROM {self.table} WHERE key = ?", victims)
+        self._count, self._bytes = count, total
+        self.evictions += len(victims)
+
+    def delete(self, tag: Optional[str] = None, keep: bool = False):
+        """Delete the rows with `tag` (all rows if None). With keep=True, delete every row except those."""
+        with self._lock:
+            self._flush_touches()
+            if tag is None:
+                self._conn.execute(f"DELETE FROM {self.table}")
+            else:
+                op = "!=" if keep else "="
+                self._conn.execute(f"DELETE FROM {self.table} WHERE tag {op} ?", (tag,))
+            self._conn.commit()
+            self._count, self._bytes = self._conn.execute(
+                f"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM {self.table}").fetchone()
+
+    def clear(self):
+        self.delete()
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def total_bytes(self) -> int:
+        return self._bytes
+
+    def flush(self):
+        """Write pending access times."""
+        with self._lock:
+            if self._conn is not None:
+                self._flush_touches()
+                self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._flush_touches()
+                self._conn.commit()
+                self._conn.close()
+                self._conn = None
+
+class SharedCache:
+    def __init__(self, factory: Callable, name: str):
+        """
+        Args:
+            factory (Callable): Cache class (or function) called with the configure() keyword arguments
+            name (str): Module name used in log messages
+        """
+        self._factory = factory
+        self._name = name
+        self._instance = None
+        self._enabled = True
+        self._lock = threading.Lock()
+
+    def get(self):
+        """Return the shared cache, or None if caching is disabled or the cache could not be opened."""
+        with self._lock:
+            if self._instance is None and self._enabled:
+                try:
+                    self._instance = self._factory()
+                except (sqlite3.Error, OSError) as e:
+                    print(f"[{self._name}] Cache unavailable, continuing without it: {e}")
+                    self._enabled = False
+            return self._instance
+
+    def configure(self, enabled: bool = True, **kwargs):
+        """Replace the shared cache with one built from the factory's keyword arguments, or disable it."""
+        with self._lock:
+            if self._instance is not None:
+                self._instance.close()
+            self._enabled = enabled
+            self._instance = self._factory(**kwargs) if enabled else None
+            return self._instance
+
+    def stats(self) -> dict:
+        cache = self.get()
+        return cache.stats() if cache else {}
@@ -3,36 +3,59 @@ Custom LLM module for the Recipe ChatBot.
 This module implements the T5 recipe generation model from Hugging Face.
 """
 import os
-from typing import List
+import importlib.util
+from typing import Iterator, List
 import re
 import ast
-
-# Attempt to support both Flax/JAX and PyTorch backends.
-try:
-    # JAX/Flax path
-    from transformers import FlaxAutoModelForSeq2SeqLM, AutoTokenizer
-    import jax
-    JAX_AVAILABLE = True
-    torch = None
-except Exception:
-    try:
-        # PyTorch path
-        from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
-        import torch
-        JAX_AVAILABLE = False
-    except Exception:
-        JAX_AVAILABLE = False
-        torch = None
+import threading
+
+from .batching import MicroBatcher
+from .generation_cache import canonical_ingredients, get_generation_cache, model_fingerprint
+from .model_registry import get_registry
+
+# Attempt to support both Flax/JAX and PyTorch backends. Only check what is installed
+# here; transformers/jax/torch are imported when a model is first loaded.
+JAX_AVAILABLE = all(importlib.util.find_spec(name) is not None for name in ("transformers", "jax", "flax"))
+jax = None
+torch = None
+
+# Model backends: "flax", "pytorch" or "onnx" (ONNX Runtime, see onnx_backend.py)
+BACKENDS = ("flax", "pytorch", "onnx")
+DEFAULT_BACKEND = os.environ.get("RECIPE_MODEL_BACKEND") or ("flax" if JAX_AVAILABLE else "pytorch")
+
+# Inputs are padded up to the next of these lengths instead of always to 512.
+# Powers of two keep the number of distinct shapes (and Flax JIT compilations) small.
+MAX_INPUT_LENGTH = 512
+LENGTH_BUCKETS = (16, 32, 64, 128, 256, 512)
+
+def bucket_length(length: int) -> int:
+    """Smallest bucket that fits `length` tokens (MAX_INPUT_LENGTH if none does)."""
+    for bucket in LENGTH_BUCKETS:
+        if length <= bucket:
+            return bucket
+    return MAX_INPUT_LENGTH
 
 class RecipeGenerator:
-    def __init__(self, model_name: str = "flax-community/t5-recipe-generation"):
+    def __init__(self, model_name: str = "flax-community/t5-recipe-generation", dynamic_padding: bool = True,
+                 backend: str = None, quantize: bool = False, use_cache: bool = True):
         """
         Initialize the RecipeGenerator with the T5 recipe generation model.
 
         Args:
             model_name (str): The Hugging Face model identifier
+            dynamic_padding (bool): Pad inputs to a length bucket instead of to MAX_INPUT_LENGTH
+            backend (str): "flax", "pytorch" or "onnx" (default: DEFAULT_BACKEND)
+            quantize (bool): With the onnx backend, run the dynamically int8-quantized model
+            use_cache (bool): Answer repeated ingredient sets from the shared generation cache
         """
         self.model_name = model_name
+        self.backend = backend or DEFAULT_BACKEND
+        if self.backend not in BACKENDS:
+            raise ValueError(f"Unknown backend '{self.backend}', expected one of {BACKENDS}")
+        self.quantize = quantize
+        self.use_cache = use_cache
+        self.dynamic_padding = dynamic_padding
+        self._flax_decode_step = None
         self.model = None
         self.tokenizer = None
         self.special_tokens = None
@@ -42,7 +65,7 @@ class RecipeGenerator:
         }
 
         # Generation parameters adjusted per backend
-        if JAX_AVAILABLE:
+        if self.backend == "flax":
             # JAX/Flax generate() supports fewer args
             self.generation_kwargs = {
                 "max_length": 512,
@@ -51,7 +74,7 @@ class RecipeGenerator:
                 "do_sample": False,  # deterministic output
             }
         else:
-            # PyTorch supports full set
+            # PyTorch (and ONNX Runtime through Optimum) supports full set
             self.generation_kwargs = {
                 "max_length": 512,
                 "min_length": 64,
@@ -62,15 +85,25 @@ class RecipeGenerator:
 
     def _load_model(self):
         """Load the Hugging Face model and tokenizer."""
+        global jax, torch
         try:
+            from transformers import AutoTokenizer
             self.tokenizer = AutoTokenizer.from_pretrained(self.model_name, use_fast=True)
             self.special_tokens = self.tokenizer.all_special_tokens
 
-            if JAX_AVAILABLE:
+            if self.backend == "flax":
+                from transformers import FlaxAutoModelForSeq2SeqLM
+                import jax
                 self.model = FlaxAutoModelForSeq2SeqLM.from_pretrained(self.model_name)
             else:
-                # PyTorch
-                self.model = AutoModelForSeq2SeqLM.from_pretrained(self.model_name)
+                # PyTorch tensors are used for the onnx backend's inputs too
+                import torch
+                if self.backend == "onnx":
+                    from .onnx_backend import load_onnx_model
+                    self.model = load_onnx_model(self.model_name, quantize=self.quantize)
+                else:
+                    from transformers import AutoModelForSeq2SeqLM
+                    self.model = AutoModelForSeq2SeqLM.from_pretrained(self.model_name)
         except Exception as e:
             raise Exception(f"Failed to load model {self.model_name}: {e}")
 
@@ -130,6 +163,18 @@ class RecipeGenerator:
 
         return "\n".join(formatted_sections)
 
+    def _ingredient_list(self, prompt_text: str) -> List[str]:
+        """Parse the 'ingredients: [...]' list out of the prompt text (empty if missing)."""
+        match = re.search(r'ingredients:\s*(\[[^\]]*\])', prompt_text, re.IGNORECASE)
+        if match:
+            try:
+                ingredients_list = ast.literal_eval(match.group(1))
+                if isinstance(ingredients_list, list):
+                    return [str(item) for item in ingredients_list]
+            except Exception:
+                pass
+        return []
+
     def _extract_ingredients(self, prompt_text: str) -> str:
         """
         Extract the ingredients list from the prompt text and convert to comma-separated string.
@@ -140,98 +185,332 @@ class RecipeGenerator:
         Returns:
             str: Comma-separated ingredients string
         """
-        match = re.search(r'ingredients:\s*(\[[^\]]*\])', prompt_text, re.IGNORECASE)
-        if match:
-            try:
-                ingredients_list = ast.literal_eval(match.group(1))
-                if isinstance(ingredients_list, list):
-                    return ", ".join(ingredients_list)
-            except Exception:
-                pass
-        return ""
+        return ", ".join(self._ingredient_list(prompt_text))
 
-    def generate_recipe(self, prompt_text: str) -> str:
+    @property
+    def fingerprint(self) -> str:
+        """Model and generation settings the generation cache is keyed on."""
+        return model_fingerprint(self.model_name, self.backend, self.quantize, self.generation_kwargs)
+
+    def _cache(self):
+        return get_generation_cache() if self.use_cache else None
+
+    def invalidate_cache(self):
+        """Forget cached generations for this model and its current generation settings."""
+        cache = get_generation_cache()
+        if cache:
+            cache.invalidate(self.fingerprint)
+
+    def _encode(self, input_texts: List[str]):
         """
-        Generate a recipe from a full prompt text (e.g., title + ingredients).
+        Tokenize model inputs into (input_ids, attention_mask) tensors for the active backend,
+        padded to the length bucket of the longest input.
+        """
+        return_tensors = "jax" if self.backend == "flax" else "pt"
+        if not self.dynamic_padding:
+            inputs = self.tokenizer(input_texts, max_length=MAX_INPUT_LENGTH, padding="max_length",
+                                    truncation=True, return_tensors=return_tensors)
+            return inputs.input_ids, inputs.attention_mask
+
+        encoded = self.tokenizer(input_texts, max_length=MAX_INPUT_LENGTH, truncation=True)
+        length = bucket_length(max(len(ids) for ids in encoded["input_ids"]))
+        inputs = self.tokenizer.pad(encoded, padding="max_length", max_length=length,
+                                    return_tensors=return_tensors)
+        return inputs["input_ids"], inputs["attention_mask"]
+
+    def _input_text(self, ingredients: List[str]) -> str:
+        """Model input for canonical ingredients ("items: a, b, c")."""
+        return "items: " + ", ".join(ingredients)
+
+    def _generate_raw(self, input_texts: List[str]) -> List[str]:
+        """Run one padded batch through model.generate and decode every sequence."""
+        count = len(input_texts)
+        if self.backend == "flax":
+            # Pad the batch to a power of two as well, so JIT shapes stay within the buckets
+            batch_size = 1 << (count - 1).bit_length()
+            input_texts = input_texts + [input_texts[-1]] * (batch_size - count)
+
+        input_ids, attention_mask = self._encode(input_texts)
+
+        if self.backend == "flax":
+            output_ids = self.model.generate(
+                input_ids=input_ids,
+                attention_mask=attention_mask,
+                **self.generation_kwargs
+            )
+            generated = output_ids.sequences
+        else:
+            # PyTorch / ONNX Runtime path
+            with torch.no_grad():
+                generated = self.model.generate(
+                    input_ids=input_ids,
+                    attention_mask=attention_mask,
+                    **self.generation_kwargs
+                )
+        return self.tokenizer.batch_decode(generated, skip_special_tokens=False)[:count]
+
+    def generate_recipes(self, prompt_texts: List[str]) -> List[str]:
+        """
+        Generate recipes for several prompts with a single batched generate call.
 
         Args:
-            prompt_text (str): Full prompt text including title and ingredients
+            prompt_texts (List[str]): Full prompt texts including title and ingredients
 
         Returns:
-            str: Generated recipe in formatted text
+            List[str]: One formatted recipe (or error message) per prompt, in order
         """
         if not self.model or not self.tokenizer:
             raise Exception("Model not loaded properly")
 
+        results = ["Could not extract ingredients from the prompt."] * len(prompt_texts)
+        cache = self._cache()
+        fingerprint = self.fingerprint
+
+        # Canonical ingredient multisets still to generate, each with the prompts waiting on it.
+        # Generating from the canonical order makes the output independent of input order.
+        pending = {}
+        for i, prompt in enumerate(prompt_texts):
+            ingredients = canonical_ingredients(self._ingredient_list(prompt))
+            if not ingredients:
+                continue
+            cached = cache.get(fingerprint, ingredients) if cache else None
+            if cached is not None:
+                results[i] = cached
+            else:
+                pending.setdefault(tuple(ingredients), []).append(i)
+        if not pending:
+            return results
+
         try:
-            # Extract ingredients and prepare input in expected format
-            ingredients_str = self._extract_ingredients(prompt_text)
-            if not ingredients_str:
-                return "Could not extract ingredients from the prompt."
-
-            input_text = "items: " + ingredients_str.strip()
-
-            # Tokenize input - choose tensor backend per availability
-            if JAX_AVAILABLE:
-                inputs = self.tokenizer(
-                    input_text,
-                    max_length=512,
-                    padding="max_length",
-                    truncation=True,
-                    return_tensors="jax"
-                )
+            generated_recipes = self._generate_raw([self._input_text(list(key)) for key in pending])
+        except Exception as e:
+            for indices in pending.values():
+                for i in indices:
+                    results[i] = f"Error generating recipe: {e}"
+            return results
+
+        # Post-process and format
+        for (key, indices), processed_recipe in zip(pending.items(), self._postprocess_text(generated_recipes)):
+            formatted_recipe = self._format_recipe(processed_recipe)
+            formatted_recipe = formatted_recipe or "Sorry, I couldn't generate a recipe with the provided prompt."
+            if cache:
+                cache.put(fingerprint, list(key), formatted_recipe)
+            for i in indices:
+                results[i] = formatted_recipe
+        return results
+
+    def warm_up(self):
+        """Run one small uncached generation so the first real request skips one-off setup (e.g. Flax JIT)."""
+        self._generate_raw([self._input_text(["salt", "water"])])
 
-                input_ids = inputs.input_ids
-                attention_mask = inputs.attention_mask
+    def generate_recipe(self, prompt_text: str) -> str:
+        """
+        Generate a recipe from a full prompt text (e.g., title + ingredients).
 
-                output_ids = self.model.generate(
-                    input_ids=input_ids,
-                    attention_mask=attention_mask,
-                    **self.generation_kwargs
-                )
-                generated = output_ids.sequences
-                generated_recipe = self.tokenizer.batch_decode(generated, skip_special_tokens=False)
-            else:
-                # PyTorch path
-                inputs = self.tokenizer(
-                    input_text,
-                    max_length=512,
-                    padding="max_length",
-                    truncation=True,
-                    return_tensors="pt"
-                )
-                input_ids = inputs.input_ids
-                attention_mask = inputs.attention_mask
+        Args:
+            prompt_text (str): Full prompt text including title and ingredients
 
+        Returns:
+            str: Generated recipe in formatted text
+        """
+        return self.generate_recipes([prompt_text])[0]
+
+    def _stream_raw(self, input_text: str) -> Iterator[str]:
+        """Yield the raw decoded text of one generation in pieces as tokens are produced."""
+        input_ids, attention_mask = self._encode([input_text])
+        if self.backend == "flax":
+            yield from self._stream_raw_flax(input_ids, attention_mask)
+            return
+
+        # PyTorch / ONNX Runtime path: generate() feeds a streamer on a worker thread
+        from transformers import TextIteratorStreamer
+        streamer = TextIteratorStreamer(self.tokenizer, skip_special_tokens=False)
+        errors = []
+
+        def run():
+            try:
                 with torch.no_grad():
-                    output_ids = self.model.generate(
-                        input_ids=input_ids,
-                        attention_mask=attention_mask,
-                        **self.generation_kwargs
-                    )
-                generated_recipe = self.tokenizer.batch_decode(output_ids, skip_special_tokens=False)
-
-            # Post-process and format
-            processed_recipe = self._postprocess_text(generated_recipe)
-            if processed_recipe:
-                formatted_recipe = self._format_recipe(processed_recipe[0])
-                return formatted_recipe or "Sorry, I couldn't generate a recipe with the provided prompt."
-            else:
-                return "Sorry, I couldn't generate a recipe with the provided prompt."
+                    self.model.generate(input_ids=input_ids, attention_mask=attention_mask,
+                                        streamer=streamer, **self.generation_kwargs)
+            except Exception as e:
+                errors.append(e)
+                streamer.end()
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        yield from streamer
+        thread.join()
+        if errors:
+            raise errors[0]
+
+    def _stream_raw_flax(self, input_ids, attention_mask) -> Iterator[str]:
+        """
+        Greedy decoding one token at a time with the KV cache, applying the same
+        min_length and no_repeat_ngram_size rules as generate().
+        """
+        import numpy as np
+        import jax.numpy as jnp
+
+        max_length = self.generation_kwargs.get("max_length", 512)
+        min_length = self.generation_kwargs.get("min_length", 0)
+        ngram_size = self.generation_kwargs.get("no_repeat_ngram_size", 0)
+        eos_id = self.model.config.eos_token_id
+
+        if self._flax_decode_step is None:
+            def step(params, token, encoder_hidden, encoder_mask, decoder_mask, past):
+                outputs = self.model.decode(token, (encoder_hidden,), encoder_attention_mask=encoder_mask,
+                                            decoder_attention_mask=decoder_mask, past_key_values=past,
+                                            params=params)
+                return outputs.logits, outputs.past_key_values
+            self._flax_decode_step = jax.jit(step)
+
+        encoder_outputs = self.model.encode(input_ids=input_ids, attention_mask=attention_mask)
+        past = self.model.init_cache(1, max_length, encoder_outputs)
+        decoder_mask = jnp.ones((1, max_length), dtype="i4")
+
+        tokens = [self.model.config.decoder_start_token_id]
+        text = ""
+        while len(tokens) < max_length:
+            logits, past = self._flax_decode_step(
+                self.model.params, jnp.array([[tokens[-1]]], dtype="i4"),
+                encoder_outputs.last_hidden_state, attention_mask, decoder_mask, past,
+            )
+            logits = np.array(logits[0, -1])
+            if len(tokens) < min_length:
+                logits[eos_id] = -np.inf
+            logits[_banned_ngram_tokens(tokens, ngram_size)] = -np.inf
+            token = int(logits.argmax())
+            tokens.append(token)
+
+            decoded = self.tokenizer.decode(tokens, skip_special_tokens=False)
+            # Hold back text that ends in a partially decoded character
+            if len(decoded) > len(text) and not decoded.endswith("\ufffd"):
+                yield decoded[len(text):]
+                text = decoded
+            if token == eos_id:
+                break
+
+    def stream_recipe(self, prompt_text: str) -> Iterator[str]:
+        """
+        Generate a recipe, yielding each formatted line ([TITLE], [DIRECTIONS] and
+        every direction) as soon as it is complete. The lines joined with "\n"
+        equal generate_recipe's result.
+        """
+        if not self.model or not self.tokenizer:
+            raise Exception("Model not loaded properly")
 
-        except Exception as e:
-            return f"Error generating recipe: {e}"
+        ingredients = canonical_ingredients(self._ingredient_list(prompt_text))
+        if not ingredients:
+            yield "Could not extract ingredients from the prompt."
+            return
 
+        cache = self._cache()
+        fingerprint = self.fingerprint
+        cached = cache.get(fingerprint, ingredients) if cache else None
+        if cached is not None:
+            yield from cached.split("\n")
+            return
 
-# Singleton helper
-_recipe_generator = None
+        formatter = RecipeStreamFormatter(self)
+        lines = []
+        try:
+            for chunk in self._stream_raw(self._input_text(ingredients)):
+                for line in formatter.feed(chunk):
+                    lines.append(line)
+                    yield line
+            for line in formatter.finish():
+                lines.append(line)
+                yield line
+        except Exception as e:
+            yield f"Error generating recipe: {e}"
+            return
+        if not lines:
+            lines.append("Sorry, I couldn't generate a recipe with the provided prompt.")
+            yield lines[0]
+        if cache:
+            cache.put(fingerprint, ingredients, "\n".join(lines))
+
+def _banned_ngram_tokens(tokens: List[int], ngram_size: int) -> List[int]:
+    """Tokens that would repeat an n-gram already in `tokens` (no_repeat_ngram_size)."""
+    if ngram_size <= 0 or len(tokens) + 1 < ngram_size:
+        return []
+    prefix = tuple(tokens[len(tokens) - ngram_size + 1:])
+    return [tokens[i + ngram_size - 1] for i in range(len(tokens) - ngram_size + 1)
+            if tuple(tokens[i:i + ngram_size - 1]) == prefix]
+
+class RecipeStreamFormatter:
+    """
+    Incremental _postprocess_text + _format_recipe: feed raw generated text in
+    pieces and get back the formatted lines that have become complete. A title
+    is complete at the end of its section, a direction at the next step
+    separator.
+    """
+    def __init__(self, generator: RecipeGenerator):
+        self.generator = generator
+        self._raw = ""
+        self._emitted = 0
+
+    def feed(self, chunk: str) -> List[str]:
+        self._raw += chunk
+        return self._new_lines(final=False)
+
+    def finish(self) -> List[str]:
+        """Flush the lines of the last, unterminated section."""
+        return self._new_lines(final=True)
+
+    def _new_lines(self, final: bool) -> List[str]:
+        text = self.generator._postprocess_text(self._raw)[0]
+        if not final:
+            # Keep only complete sections, plus the finished steps of a directions section
+            head, sep, tail = text.rpartition("\n")
+            if tail.strip().lower().startswith("directions:") and "--" in tail:
+                head += sep + tail[:tail.rindex("--")]
+            text = head
+        formatted = self.generator._format_recipe(text)
+        lines = formatted.split("\n") if formatted else []
+        new_lines = lines[self._emitted:]
+        self._emitted = max(self._emitted, len(lines))
+        return new_lines
+
+
+# Shared generator, held in the model registry
+RECIPE_MODEL_NAME = "flax-community/t5-recipe-generation"
+_recipe_batcher = None
+_batcher_lock = threading.Lock()
+
+# Requests arriving within this window are generated together, up to this many at once
+BATCH_MAX_WAIT_MS = 20
+BATCH_MAX_SIZE = 8
+
+def _generator_spec():
+    """(kind, name, loader, params) of the shared generator in the model registry."""
+    backend = DEFAULT_BACKEND
+    return "t5", RECIPE_MODEL_NAME, lambda: RecipeGenerator(RECIPE_MODEL_NAME, backend=backend), {"backend": backend}
 
 def get_recipe_generator() -> RecipeGenerator:
-    global _recipe_generator
-    if _recipe_generator is None:
-        _recipe_generator = RecipeGenerator()
-    return _recipe_generator
+    """The shared generator, loaded once per process (a warm-up and a first request share the load)."""
+    return get_registry().get(*_generator_spec())
+
+def _generate_batch(prompt_texts: List[str]) -> List[str]:
+    # Pinned for the batch so a memory-budget eviction can't drop it mid-generation
+    with get_registry().use(*_generator_spec()) as generator:
+        return generator.generate_recipes(prompt_texts)
+
+def get_recipe_batcher() -> MicroBatcher:
+    """Shared micro-batcher that groups concurrent requests into generate_recipes calls."""
+    global _recipe_batcher
+    with _batcher_lock:
+        if _recipe_batcher is None:
+            _recipe_batcher = MicroBatcher(_generate_batch, max_batch=BATCH_MAX_SIZE, max_wait_ms=BATCH_MAX_WAIT_MS)
+        return _recipe_batcher
 
 def generate_recipe_from_ingredients(prompt_text: str) -> str:
-    generator = get_recipe_generator()
-    return generator.generate_recipe(prompt_text)
\ No newline at end of file
+    try:
+        return get_recipe_batcher()(prompt_text)
+    except Exception as e:
+        return f"Error generating recipe: {e}"
+
+def stream_recipe_from_ingredients(prompt_text: str) -> Iterator[str]:
+    """Yield the recipe line by line as it is generated (see RecipeGenerator.stream_recipe)."""
+    with get_registry().use(*_generator_spec()) as generator:
+        yield from generator.stream_recipe(prompt_text)
@@ -0,0 +1,147 @@
+"""
+Dish vocabulary for zero-shot image classification.
+
+The label catalog is gathered from data: the built-in Singapore dishes, the
+recipe corpus (data/recipes and the data/ingredients titles) and the
+TheMealDB mirror, de-duplicated case-insensitively. src/scripts/build_dish_index.py
+embeds it offline with CLIP into a float16 matrix behind a flat or IVF
+index (data/dish_index.npz), so classifying an image costs one image
+encoding plus a top-k search however large the vocabulary is.
+"""
+import os
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from .label_bank import labels_hash
+from .utils import DATA_DIR
+from .vector_index import INDEX_TYPES, FlatIndex, IVFIndex
+
+DISH_INDEX_PATH = os.path.join(DATA_DIR, 'dish_index.npz')
+INGREDIENTS_DIR = os.path.join(DATA_DIR, 'ingredients')
+
+# Labels looked up per image when classifying against the index
+TOP_K = 20
+# Above this many labels the build script defaults to an IVF index
+IVF_MIN_LABELS = 20000
+
+SINGAPORE_DISHES = [
+    "Hainanese chicken rice",
+    "Laksa",
+    "Char kway teow",
+    "Chilli crab",
+    "Satay",
+    "Roti prata",
+    "Bak kut teh",
+    "Nasi lemak",
+    "Kaya toast",
+    "Fish head curry",
+    "Mee siam",
+    "Chicken rice",
+    "Wanton mee",
+    "Hokkien mee",
+    "Popiah",
+    "Ice kacang",
+    "Chendol",
+    "Tau huay",
+    "Carrot cake",
+    "Otah"
+]
+
+def _recipe_labels() -> List[str]:
+    from .nlu import load_dish_keywords
+
+    labels = [" ".join(name.split("_")).capitalize() for name in load_dish_keywords()]
+    if os.path.isdir(INGREDIENTS_DIR):
+        for filename in sorted(os.listdir(INGREDIENTS_DIR)):
+            if filename.endswith(".txt"):
+                with open(os.path.join(INGREDIENTS_DIR, filename), 'r', encoding='utf-8') as f:
+                    first_line = f.readline()
+                if first_line.lower().startswith("title:"):
+                    labels.append(first_line[len("title:"):].strip())
+    return labels
+
+def _mirror_labels() -> List[str]:
+    from .themealdb_mirror import get_mirror
+
+    mirror = get_mirror()
+    return mirror.meal_names() if mirror is not None else []
+
+def load_dish_labels(extra_labels: Optional[List[str]] = None) -> List[str]:
+    """The label catalog: built-in dishes, recipe corpus, TheMealDB mirror, then extras, without duplicates."""
+    labels = []
+    seen = set()
+    for label in SINGAPORE_DISHES + _recipe_labels() + _mirror_labels() + list(extra_labels or []):
+        label = " ".join(label.split())
+        key = label.lower()
+        if label and key not in seen:
+            seen.add(key)
+            labels.append(label)
+    return labels
+
+class DishIndex:
+    def __init__(self, labels: List[str], index, logit_scale: float, model_name: str, revision: str):
+        self.labels = labels
+        self.index = index
+        self.logit_scale = logit_scale
+        self.model_name = model_name
+        self.revision = revision
+        self.fingerprint = f"{index.kind}:{labels_hash(labels)}"
+
+    @classmethod
+    def build(cls, labels: List[str], embeddings: np.ndarray, logit_scale: float, model_name: str,
+              revision: str, index_type: str = "auto", **index_kwargs) -> "DishIndex":
+        if index_type == "auto":
+            index_type = IVFIndex.kind if len(labels) >= IVF_MIN_LABELS else FlatIndex.kind
+        index = IVFIndex.build(embeddings, **index_kwargs) if index_type == IVFIndex.kind else FlatIndex(embeddings)
+        return cls(labels, index, logit_scale, model_name, revision)
+
+    def save(self, path: str = DISH_INDEX_PATH):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, labels=np.array(self.labels), kind=np.array(self.index.kind),
+                     logit_scale=np.array(self.logit_scale), model_name=np.array(self.model_name),
+                     revision=np.array(self.revision), **self.index.to_arrays())
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str = DISH_INDEX_PATH) -> "DishIndex":
+        with np.load(path) as arrays:
+            index = INDEX_TYPES[str(arrays["kind"])].from_arrays(arrays)
+            return cls([str(label) for label in arrays["labels"]], index, float(arrays["logit_scale"]),
+                       str(arrays["model_name"]), str(arrays["revision"]))
+
+    def top_k(self, image_embeddings: np.ndarray, k: int = TOP_K) -> List[List[Tuple[str, float]]]:
+        """
+        Per image, the k best labels with probabilities of a softmax over all
+        labels, like LabelBank.top_k, so both compare alike against a threshold.
+        """
+        scores, ids, log_partition = self.index.search_normalized(image_embeddings, k, self.logit_scale)
+        probs = np.exp(self.logit_scale * scores - log_partition[:, None])
+        return [[(self.labels[i], float(p)) for i, p in zip(row_ids, row_probs) if i >= 0]
+                for row_ids, row_probs in zip(ids, probs)]
+
+    def best(self, image_embedding: np.ndarray, extra_labels: Optional[List[str]] = None,
+             extra_embeddings: Optional[np.ndarray] = None) -> Tuple[str, float]:
+        """
+        (label, confidence) for one image. The softmax is taken over all
+        labels plus any extra candidates (e.g. an encoded user prompt).
+        """
+        scores, ids, log_partition = self.index.search_normalized(image_embedding, TOP_K, self.logit_scale)
+        candidates = [self.labels[i] for i in ids[0] if i >= 0]
+        logits = self.logit_scale * scores[0, :len(candidates)]
+        log_partition = log_partition[0]
+        if extra_labels:
+            candidates = list(extra_labels) + candidates
+            extra_scores = np.atleast_2d(extra_embeddings) @ np.atleast_2d(image_embedding)[0].astype(np.float32)
+            extra_logits = self.logit_scale * extra_scores
+            logits = np.concatenate([extra_logits, logits])
+            log_partition = np.logaddexp(log_partition, np.logaddexp.reduce(extra_logits))
+        best = int(logits.argmax())
+        return candidates[best], float(np.exp(logits[best] - log_partition))
+
+def load_dish_index(path: str = DISH_INDEX_PATH) -> Optional[DishIndex]:
+    """The index built by build_dish_index.py, or None if it has not been built."""
+    if not os.path.exists(path):
+        return None
+    return DishIndex.load(path)
@@ -0,0 +1,106 @@
+"""
+Typo-tolerant word lookup for dish matching.
+
+Uses the SymSpell "symmetric delete" scheme: every vocabulary word is stored
+under all of its deletion variants up to MAX_DISTANCE, so a lookup only has to
+generate the deletions of the query word. The number of candidates depends on
+the length of the query word, not on the size of the vocabulary.
+"""
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+MAX_DISTANCE = 2
+
+def _deletes(word: str, max_distance: int) -> Set[str]:
+    """Return every string obtained by deleting up to max_distance characters."""
+    results = {word}
+    frontier = {word}
+    for _ in range(max_distance):
+        next_frontier = set()
+        for item in frontier:
+            if len(item) <= 1:
+                continue
+            for i in range(len(item)):
+                next_frontier.add(item[:i] + item[i + 1:])
+        results |= next_frontier
+        frontier = next_frontier
+    return results
+
+def edit_distance(a: str, b: str, max_distance: int = MAX_DISTANCE) -> int:
+    """
+    Optimal string alignment distance (Levenshtein plus adjacent transpositions).
+    Returns max_distance + 1 as soon as the distance is known to exceed the bound.
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    prev_prev = None
+    prev = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        cur = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + cost)
+            if (prev_prev is not None and i > 1 and j > 1
+                    and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]):
+                cur[j] = min(cur[j], prev_prev[j - 2] + 1)
+        if min(cur) > max_distance:
+            return max_distance + 1
+        prev_prev, prev = prev, cur
+    return prev[-1]
+
+def allowed_distance(word: str) -> int:
+    """Short words are too ambiguous to correct; longer ones tolerate more typos."""
+    if len(word) < 5:
+        return 0
+    if len(word) <= 8:
+        return 1
+    return 2
+
+class FuzzyVocabulary:
+    def __init__(self, words: Iterable[str] = (), max_distance: int = MAX_DISTANCE):
+        """
+        Build a delete-variant index over a vocabulary of words.
+
+        Args:
+            words: Vocabulary words (already normalized)
+            max_distance (int): Largest edit distance that lookups may use
+        """
+        self.max_distance = max_distance
+        self.words: Set[str] = set()
+        self._deletes: Dict[str, Set[str]] = {}
+        for word in words:
+            self.add(word)
+
+    def add(self, word: str):
+        """Add a word to the vocabulary."""
+        if not word or word in self.words:
+            return
+        self.words.add(word)
+        for variant in _deletes(word, self.max_distance):
+            self._deletes.setdefault(variant, set()).add(word)
+
+    def lookup(self, word: str, max_distance: Optional[int] = None) -> Optional[Tuple[str, int]]:
+        """
+        Return the closest vocabulary word as (word, distance), or None.
+        Ties are broken by preferring the alphabetically first word.
+        """
+        if max_distance is None:
+            max_distance = allowed_distance(word)
+        max_distance = min(max_distance, self.max_distance)
+        if word in self.words:
+            return word, 0
+        if max_distance == 0:
+            return None
+
+        best = None
+        seen = set()
+        for variant in _deletes(word, max_distance):
+            for candidate in self._deletes.get(variant, ()):
+                if candidate in seen:
+                    continue
+                seen.add(candidate)
+                distance = edit_distance(word, candidate, max_distance)
+                if distance > max_distance:
+                    continue
+                if best is None or (distance, candidate) < (best[1], best[0]):
+                    best = (candidate, distance)
+        return best
@@ -0,0 +1,143 @@
+"""
+Cache of deterministic T5 recipe generations.
+
+With do_sample=False a generated recipe depends only on the model, the
+generation settings and the ingredients. Entries are keyed on a fingerprint
+of the first two plus the canonical ingredient multiset (lowercased,
+whitespace-collapsed and sorted), so requests that only reorder or re-case
+ingredients are answered from the cache. An in-memory LRU sits in front of
+an optional SQLite store in data/cache.
+"""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Iterable, List, Optional
+
+from .cache_store import SharedCache, SQLiteLRU
+from .utils import cache_path
+
+CACHE_FILE = 'recipe_generations.sqlite'
+DEFAULT_MAX_ENTRIES = 1024
+DEFAULT_MAX_DISK_ENTRIES = 100000
+DEFAULT_MAX_DISK_BYTES = 256 * 1024 * 1024
+
+def canonical_ingredients(ingredients: Iterable[str]) -> List[str]:
+    """Lowercase, collapse whitespace and sort; duplicates are kept (it is a multiset)."""
+    items = (" ".join(str(item).lower().split()) for item in ingredients)
+    return sorted(item for item in items if item)
+
+def model_fingerprint(model_name: str, backend: str, quantize: bool, generation_kwargs: dict) -> str:
+    """Identifies everything besides the ingredients that the output depends on."""
+    settings = {"model": model_name, "backend": backend, "quantize": quantize, "generation": generation_kwargs}
+    return hashlib.sha1(json.dumps(settings, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+def _entry_key(fingerprint: str, ingredients: List[str]) -> str:
+    payload = fingerprint + "\0" + "\x1f".join(ingredients)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class GenerationCache:
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, persist: bool = False, path: Optional[str] = None,
+                 max_disk_entries: int = DEFAULT_MAX_DISK_ENTRIES, max_disk_bytes: int = DEFAULT_MAX_DISK_BYTES):
+        """
+        Args:
+            max_entries (int): Generations kept in memory before least recently used ones are evicted
+            persist (bool): Also keep generations in SQLite so they survive restarts
+            path (str): SQLite file (defaults to data/cache/recipe_generations.sqlite)
+            max_disk_entries (int): Generations kept on disk before least recently used ones are evicted
+            max_disk_bytes (int): Bytes of generated text kept on disk before least recently used ones are evicted
+        """
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (fingerprint, text)
+        self._lock = threading.Lock()
+        self._store = None
+        if persist:
+            self.path = path or cache_path(CACHE_FILE)
+            self._store = SQLiteLRU(self.path, "generations", max_entries=max_disk_entries, max_bytes=max_disk_bytes)
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, fingerprint: str, ingredients: List[str]) -> Optional[str]:
+        """Cached generation for canonical `ingredients`, or None."""
+        key = _entry_key(fingerprint, ingredients)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if self._store is not None:
+                row = self._store.get(key)
+                if row is not None:
+                    self.disk_hits += 1
+                    self._remember(key, fingerprint, row[0])
+                    return row[0]
+            self.misses += 1
+        return None
+
+    def put(self, fingerprint: str, ingredients: List[str], result: str):
+        key = _entry_key(fingerprint, ingredients)
+        with self._lock:
+            self._remember(key, fingerprint, result)
+            if self._store is not None:
+                self._store.put(key, result, tag=fingerprint)
+
+    def _remember(self, key: str, fingerprint: str, result: str):
+        self._entries[key] = (fingerprint, result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, fingerprint: Optional[str] = None, keep: bool = False):
+        """
+        Drop the generations made with `fingerprint` (all of them if None). With
+        keep=True, drop every generation except those, e.g. after a model upgrade.
+        """
+        with self._lock:
+            if fingerprint is None:
+                self._entries.clear()
+            else:
+                for key in [k for k, (fp, _) in self._entries.items() if (fp == fingerprint) != keep]:
+                    del self._entries[key]
+            if self._store is not None:
+                self._store.delete(fingerprint, keep)
+
+    def clear(self):
+        self.invalidate()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else None,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "disk_evictions": self._store.evictions if self._store is not None else None,
+                "disk_entries": len(self._store) if self._store is not None else None,
+                "disk_bytes": self._store.total_bytes if self._store is not None else None,
+            }
+
+    def close(self):
+        with self._lock:
+            if self._store is not None:
+                self._store.close()
+                self._store = None
+
+_shared_cache = SharedCache(GenerationCache, "generation_cache")
+
+def get_generation_cache() -> Optional[GenerationCache]:
+    """Return the shared generation cache, or None if caching is disabled."""
+    return _shared_cache.get()
+
+def configure_generation_cache(enabled: bool = True, **kwargs) -> Optional[GenerationCache]:
+    """Replace the shared cache with one built from GenerationCache keyword arguments, or disable it."""
+    return _shared_cache.configure(enabled, **kwargs)
+
+def generation_cache_stats() -> dict:
+    return _shared_cache.stats()
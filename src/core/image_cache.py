@@ -0,0 +1,153 @@
+"""
+Cache of per-image CLIP/BLIP results.
+
+Users re-send the same photos (retries, the Send button, the data/images demo
+set), and every resend used to run CLIP and often BLIP again. Entries are
+keyed on a hash of the decoded pixels (so the same picture hits whatever its
+file name) plus a model id naming the model revision and, for labels, the
+label set. Each entry holds whichever of the CLIP image embedding, best
+label with its confidence and BLIP caption have been computed. An in-memory
+LRU sits in front of an optional SQLite store in data/cache, bounded by
+entry count and by total bytes since embeddings dominate its size.
+"""
+import hashlib
+import pickle
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+
+from .cache_store import SharedCache, SQLiteLRU
+from .utils import cache_path
+
+CACHE_FILE = 'image_results.sqlite'
+DEFAULT_MAX_ENTRIES = 512
+DEFAULT_MAX_DISK_ENTRIES = 50000
+DEFAULT_MAX_DISK_BYTES = 256 * 1024 * 1024
+FIELDS = ("embedding", "label", "caption")
+
+def image_digest(image) -> str:
+    """Hash of a decoded PIL image: its mode, size and pixel bytes."""
+    digest = hashlib.sha256(f"{image.mode}:{image.size[0]}x{image.size[1]}".encode("utf-8"))
+    digest.update(image.tobytes())
+    return digest.hexdigest()
+
+def _entry_key(digest: str, model_id: str) -> str:
+    return hashlib.sha256((digest + "\0" + model_id).encode("utf-8")).hexdigest()
+
+def _dumps(entry: dict) -> bytes:
+    embedding = entry.get("embedding")
+    if embedding is not None:
+        entry = {**entry, "embedding": embedding.astype(np.float32)}
+    return pickle.dumps(entry, protocol=pickle.HIGHEST_PROTOCOL)
+
+class ImageCache:
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, persist: bool = False, path: Optional[str] = None,
+                 max_disk_entries: int = DEFAULT_MAX_DISK_ENTRIES, max_disk_bytes: int = DEFAULT_MAX_DISK_BYTES):
+        """
+        Args:
+            max_entries (int): Images kept in memory before least recently used ones are evicted
+            persist (bool): Also keep results in SQLite so they survive restarts
+            path (str): SQLite file (defaults to data/cache/image_results.sqlite)
+            max_disk_entries (int): Images kept on disk before least recently used ones are evicted
+            max_disk_bytes (int): Bytes of results kept on disk before least recently used ones are evicted
+        """
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> {field: value}
+        self._lock = threading.Lock()
+        self._store = None
+        if persist:
+            self.path = path or cache_path(CACHE_FILE)
+            self._store = SQLiteLRU(self.path, "images", max_entries=max_disk_entries, max_bytes=max_disk_bytes)
+        self.hits = dict.fromkeys(FIELDS, 0)
+        self.disk_hits = dict.fromkeys(FIELDS, 0)
+        self.misses = dict.fromkeys(FIELDS, 0)
+        self.evictions = 0
+
+    def _load(self, key: str) -> dict:
+        row = self._store.get(key) if self._store is not None else None
+        return pickle.loads(row[0]) if row is not None else {}
+
+    def get(self, digest: str, model_id: str, field: str):
+        """
+        Cached `field` for the image and model: "embedding" (a (1, dim) float32
+        array), "label" ((label, confidence)) or "caption". None if not cached.
+        """
+        key = _entry_key(digest, model_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and field in entry:
+                self._entries.move_to_end(key)
+                self.hits[field] += 1
+                return entry[field]
+            stored = self._load(key)
+            if field in stored:
+                self.disk_hits[field] += 1
+                self._remember(key, stored)
+                return stored[field]
+            self.misses[field] += 1
+        return None
+
+    def put(self, digest: str, model_id: str, **fields):
+        """Store some of embedding=, label=(label, confidence) and caption= for the image and model."""
+        key = _entry_key(digest, model_id)
+        with self._lock:
+            entry = dict(self._entries.get(key) or self._load(key))
+            entry.update((k, v) for k, v in fields.items() if v is not None)
+            self._remember(key, entry)
+            if self._store is not None:
+                self._store.put(key, _dumps(entry))
+
+    def _remember(self, key: str, entry: dict):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            if self._store is not None:
+                self._store.clear()
+
+    def stats(self) -> dict:
+        """Hits, disk hits, misses and hit rate per field, plus entry counts."""
+        with self._lock:
+            fields = {}
+            for field in FIELDS:
+                lookups = self.hits[field] + self.disk_hits[field] + self.misses[field]
+                fields[field] = {
+                    "hits": self.hits[field],
+                    "disk_hits": self.disk_hits[field],
+                    "misses": self.misses[field],
+                    "hit_rate": (self.hits[field] + self.disk_hits[field]) / lookups if lookups else None,
+                }
+            return {
+                **fields,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "disk_evictions": self._store.evictions if self._store is not None else None,
+                "disk_entries": len(self._store) if self._store is not None else None,
+                "disk_bytes": self._store.total_bytes if self._store is not None else None,
+            }
+
+    def close(self):
+        with self._lock:
+            if self._store is not None:
+                self._store.close()
+                self._store = None
+
+_shared_cache = SharedCache(ImageCache, "image_cache")
+
+def get_image_cache() -> Optional[ImageCache]:
+    """Return the shared image cache, or None if caching is disabled."""
+    return _shared_cache.get()
+
+def configure_image_cache(enabled: bool = True, **kwargs) -> Optional[ImageCache]:
+    """Replace the shared cache with one built from ImageCache keyword arguments, or disable it."""
+    return _shared_cache.configure(enabled, **kwargs)
+
+def image_cache_stats() -> dict:
+    return _shared_cache.stats()
@@ -0,0 +1,263 @@
+"""
+Ingredient -> recipe index for "what can I cook with ..." queries.
+
+Every recipe (data/recipes, plus the example ingredient lists in
+data/ingredients) gets a numeric id, and every ingredient word maps to a
+bitset of the ids that use it. A query ingredient is the intersection of its
+words' bitsets. Recipes are ranked by the Jaccard similarity between the
+query ingredients and the recipe's own ingredient list, so a recipe that
+merely contains one common query ingredient ("salt") does not outrank one
+that matches the query as a whole. Bitsets are roaring bitmaps when pyroaring is installed and plain
+Python ints otherwise.
+"""
+import os
+import sys
+import re
+import ast
+import threading
+from typing import Dict, List, Tuple
+
+if __package__ in (None, ""):
+    # Run as a script (python src/core/ingredients.py): make the src package importable
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.core.recipe_store import RECIPE_DIR, get_default_store
+from src.core.search import tokenize
+from src.core.utils import DATA_DIR
+
+INGREDIENTS_DIR = os.path.join(DATA_DIR, 'ingredients')
+
+try:
+    from pyroaring import BitMap
+    ROARING_AVAILABLE = True
+except Exception:
+    BitMap = None
+    ROARING_AVAILABLE = False
+
+# Words in an ingredient line that describe amount or preparation, not the ingredient
+NON_INGREDIENT_WORDS = {
+    "c", "cup", "tbsp", "tsp", "tablespoon", "teaspoon", "g", "kg", "ml", "l", "lb", "oz",
+    "liter", "litre", "pkg", "package", "packet", "can", "jar", "box", "carton", "piece",
+    "handful", "bunch", "pinch", "clove", "inch", "cm", "large", "small", "medium", "whole",
+    "about", "sliced", "minced", "chopped", "diced", "cubed", "peeled", "deveined", "cut",
+    "finely", "lightly", "firmly", "packed", "beaten", "shredded", "split", "divided",
+    "cleaned", "taste", "serve", "serving", "finish", "adjust", "into", "up", "size", "bite",
+    "optional", "fresh", "live", "rendered", "short", "length", "reserved", "unpeeled",
+    "boned", "melted", "broken", "classic", "use", "youll", "need",
+}
+
+_NUMBER_RE = re.compile(r"^\d+[a-z]*$")
+
+def ingredient_words(item: str) -> List[str]:
+    """Reduce an ingredient line like "1 (8 oz.) pkg. cream cheese, cubed" to ["cream", "cheese"]."""
+    item = re.sub(r"\([^)]*\)", " ", item)
+    return [w for w in tokenize(item) if w not in NON_INGREDIENT_WORDS and not _NUMBER_RE.match(w)]
+
+def split_ingredient_list(text: str) -> List[str]:
+    """Split free text such as "chicken, garlic and rice" into ingredient phrases."""
+    text = re.sub(r"\([^)]*\)", " ", text)
+    parts = re.split(r",|;|\band\b|\bor\b|\bwith\b|/", text, flags=re.IGNORECASE)
+    return [p.strip() for p in parts if p.strip()]
+
+def parse_ingredient_query(text: str) -> List[str]:
+    """
+    Extract the ingredients from a user query. Accepts the custom-model prompt
+    format ("ingredients: [...]") as well as plain lists ("I have eggs, rice and garlic").
+    """
+    match = re.search(r'ingredients:\s*(\[[^\]]*\])', text, re.IGNORECASE)
+    if match:
+        try:
+            items = ast.literal_eval(match.group(1))
+            if isinstance(items, list):
+                return [str(i) for i in items]
+        except Exception:
+            pass
+    text = re.sub(r"^.*?\b(cook|make|have|with|using|got)\b:?", "", text.strip(), count=1, flags=re.IGNORECASE)
+    return split_ingredient_list(text.rstrip("?.!"))
+
+def _recipe_ingredient_section(text: str) -> str:
+    """The ingredient list is the first sentence of each recipe in data/recipes."""
+    first = re.split(r"\.\s", text, maxsplit=1)[0]
+    return re.sub(r"^.*?(you.ll need|:\s*use)\s", "", first, count=1, flags=re.IGNORECASE)
+
+def _read_ingredient_file(path: str) -> Tuple[str, List[str]]:
+    """Return (title, ingredient lines) from a data/ingredients prompt file."""
+    with open(path, 'r', encoding='utf-8') as f:
+        text = f.read()
+    title_match = re.search(r'title:\s*(.+)', text, re.IGNORECASE)
+    title = title_match.group(1).strip() if title_match else os.path.basename(path)[:-4]
+    return title, parse_ingredient_query(text)
+
+def _new_bitset():
+    return BitMap() if ROARING_AVAILABLE else 0
+
+def _bitset_from_ids(ids: List[int]):
+    if ROARING_AVAILABLE:
+        return BitMap(ids)
+    # Set bits in a bytearray first: OR-ing shifted ints one id at a time is quadratic
+    bits = bytearray(max(ids) // 8 + 1)
+    for i in ids:
+        bits[i >> 3] |= 1 << (i & 7)
+    return int.from_bytes(bits, 'little')
+
+def _bitset_ids(bitset, limit: int = None) -> List[int]:
+    """Return the ids set in the bitset in increasing order, at most limit of them."""
+    if ROARING_AVAILABLE:
+        return list(bitset)[:limit] if limit is not None else list(bitset)
+    ids = []
+    while bitset and (limit is None or len(ids) < limit):
+        low = bitset & -bitset
+        ids.append(low.bit_length() - 1)
+        bitset ^= low
+    return ids
+
+def _contains(bitset, i: int) -> bool:
+    if ROARING_AVAILABLE:
+        return i in bitset
+    return bool((bitset >> i) & 1)
+
+def _difference(a, b):
+    return a - b if ROARING_AVAILABLE else a & ~b
+
+class IngredientIndex:
+    def __init__(self):
+        self.recipes: List[Tuple[str, str]] = []  # id -> (name, source)
+        self.sizes: List[int] = []                # id -> number of ingredients in the recipe
+        self.postings: Dict[str, List[int]] = {}  # ingredient word -> ids, while building
+        self.bitsets: Dict[str, object] = {}      # ingredient word -> bitset of ids
+
+    def add_recipe(self, name: str, source: str, items: List[str]) -> int:
+        """Index a recipe given its ingredient phrases. Returns its id."""
+        recipe_id = len(self.recipes)
+        self.recipes.append((name, source))
+        self.sizes.append(max(1, sum(1 for item in items if ingredient_words(item))))
+        words = {w for item in items for w in ingredient_words(item)}
+        for word in words:
+            self.postings.setdefault(word, []).append(recipe_id)
+            self.bitsets.pop(word, None)
+        return recipe_id
+
+    def word_bitset(self, word: str):
+        """Bitset of recipes using the word, or None if no recipe does."""
+        bitset = self.bitsets.get(word)
+        if bitset is None:
+            ids = self.postings.get(word)
+            if not ids:
+                return None
+            bitset = self.bitsets[word] = _bitset_from_ids(ids)
+        return bitset
+
+    def ingredient_bitset(self, item: str):
+        """Bitset of recipes containing every word of the ingredient phrase."""
+        words = ingredient_words(item)
+        if not words:
+            return None
+        result = None
+        for word in words:
+            bitset = self.word_bitset(word)
+            if bitset is None:
+                return _new_bitset()
+            result = bitset if result is None else result & bitset
+        return result
+
+    def search(self, items: List[str], k: int = 10) -> List[dict]:
+        """
+        Rank recipes by Jaccard similarity of the query and recipe ingredients.
+        Returns dicts with name, source, matched (list of query ingredients),
+        coverage (share of the query matched), recipe_coverage (share of the
+        recipe's ingredients matched) and jaccard.
+        """
+        query = []
+        for item in items:
+            bitset = self.ingredient_bitset(item)
+            if bitset is not None:
+                query.append((item, bitset))
+        if not query:
+            return []
+
+        # at_least[j] = recipes containing at least j of the query ingredients,
+        # maintained with whole-bitset operations (a bit-sliced counter)
+        m = len(query)
+        at_least = [_new_bitset() for _ in range(m + 2)]
+        for _, bitset in query:
+            for j in range(m, 1, -1):
+                at_least[j] = at_least[j] | (at_least[j - 1] & bitset)
+            at_least[1] = at_least[1] | bitset
+
+        # Tiers go from most to fewest matched query ingredients. A recipe
+        # matching j of them has Jaccard j / (m + size - j) <= j / m, so once k
+        # results beat the best the next tier could reach, the rest is skipped.
+        results = []
+        for j in range(m, 0, -1):
+            if len(results) >= k and results[k - 1]["jaccard"] >= j / m:
+                break
+            exact = _difference(at_least[j], at_least[j + 1])
+            for recipe_id in _bitset_ids(exact):
+                name, source = self.recipes[recipe_id]
+                size = max(self.sizes[recipe_id], j)
+                results.append({
+                    "name": name,
+                    "source": source,
+                    "matched": [item for item, bitset in query if _contains(bitset, recipe_id)],
+                    "coverage": j / m,
+                    "recipe_coverage": j / size,
+                    "jaccard": j / (m + size - j),
+                })
+            results.sort(key=lambda r: (-r["jaccard"], -r["coverage"], r["name"]))
+            del results[k:]
+        return results
+
+def build_ingredient_index() -> IngredientIndex:
+    """Index the recipes (packed store or data/recipes) and the data/ingredients prompt files."""
+    index = IngredientIndex()
+    store = get_default_store()
+    if store is not None:
+        recipes = ((name, store.get(name)) for name in store.dish_names())
+    else:
+        def _read(filename):
+            with open(os.path.join(RECIPE_DIR, filename), 'r', encoding='utf-8') as f:
+                return f.read()
+        recipes = ((f[:-4], _read(f)) for f in sorted(os.listdir(RECIPE_DIR)) if f.endswith('.txt'))
+    for name, text in recipes:
+        index.add_recipe(name, "recipes", split_ingredient_list(_recipe_ingredient_section(text)))
+
+    if os.path.isdir(INGREDIENTS_DIR):
+        for filename in sorted(os.listdir(INGREDIENTS_DIR)):
+            if filename.endswith('.txt'):
+                title, items = _read_ingredient_file(os.path.join(INGREDIENTS_DIR, filename))
+                index.add_recipe(title, "ingredients", items)
+    return index
+
+def _source_signature():
+    store = get_default_store()
+    recipes_mtime = store.mtime_ns if store is not None else os.stat(RECIPE_DIR).st_mtime_ns
+    ingredients_mtime = os.stat(INGREDIENTS_DIR).st_mtime_ns if os.path.isdir(INGREDIENTS_DIR) else 0
+    return (recipes_mtime, ingredients_mtime)
+
+_ingredient_index = None
+_ingredient_index_lock = threading.Lock()
+
+def get_ingredient_index() -> IngredientIndex:
+    """Return the shared index, rebuilding it when the recipe or ingredient directories change."""
+    global _ingredient_index
+    signature = _source_signature()
+    with _ingredient_index_lock:
+        if _ingredient_index is None or _ingredient_index[0] != signature:
+            _ingredient_index = (signature, build_ingredient_index())
+        return _ingredient_index[1]
+
+def find_recipes_by_ingredients(items: List[str], k: int = 10) -> List[dict]:
+    """Return up to k recipes ranked by Jaccard similarity to the given ingredients."""
+    return get_ingredient_index().search(items, k)
+
+# Example usage
+if __name__ == "__main__":
+    for q in ["What can I cook with prawns, coconut milk and rice noodles?",
+              "I have pork ribs, garlic and soy sauce",
+              'ingredients: ["1 (8 oz.) pkg. cream cheese, cubed", "1/3 c. butter, cubed"]']:
+        items = parse_ingredient_query(q)
+        print(f"Query: {q}\nIngredients: {items}")
+        for r in find_recipes_by_ingredients(items, k=3):
+            print(f"  {r['name']} ({r['source']}): {r['coverage']:.0%} of query, "
+                  f"{r['recipe_coverage']:.0%} of recipe {r['matched']}")
+        print()
@@ -1,7 +1,90 @@
 import os
+import sys
+import threading
+from collections import OrderedDict
+
+if __package__ in (None, ""):
+    # Run as a script (python src/core/knowledge.py): make the src package importable
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.core.recipe_store import get_default_store
 
 RECIPE_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'data', 'recipes')
 
+# Default in-memory budget for cached recipe text
+RECIPE_CACHE_MAX_BYTES = 16 * 1024 * 1024
+
+class RecipeCache:
+    def __init__(self, max_bytes: int = RECIPE_CACHE_MAX_BYTES):
+        """
+        Size-bounded LRU cache of recipe file contents.
+        Entries are checked against the file's mtime and size on every lookup.
+
+        Args:
+            max_bytes (int): Maximum total size of cached files in bytes
+        """
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # path -> (mtime_ns, size, text)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, path: str):
+        """Return the text of the file at path, or None if it does not exist."""
+        try:
+            st = os.stat(path)
+        except OSError:
+            with self._lock:
+                self._discard(path)
+            return None
+
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry and entry[0] == st.st_mtime_ns and entry[1] == st.st_size:
+                self._entries.move_to_end(path)
+                self.hits += 1
+                return entry[2]
+            self.misses += 1
+
+        with open(path, 'r', encoding='utf-8') as f:
+            text = f.read()
+
+        with self._lock:
+            self._discard(path)
+            if st.st_size <= self.max_bytes:
+                self._entries[path] = (st.st_mtime_ns, st.st_size, text)
+                self._bytes += st.st_size
+                while self._bytes > self.max_bytes:
+                    _, (_, size, _) = self._entries.popitem(last=False)
+                    self._bytes -= size
+                    self.evictions += 1
+        return text
+
+    def _discard(self, path: str):
+        entry = self._entries.pop(path, None)
+        if entry:
+            self._bytes -= entry[1]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+_recipe_cache = RecipeCache()
+
 def get_recipe(dish_name):
     """
     Given a dish name (without .txt), return the recipe text.
@@ -10,15 +93,44 @@ def get_recipe(dish_name):
     if not dish_name:
         return "Sorry, I couldn't find the dish in your query."
 
-    recipe_path = os.path.join(RECIPE_DIR, dish_name + ".txt")
-    if os.path.exists(recipe_path):
-        with open(recipe_path, 'r', encoding='utf-8') as f:
-            return f.read()
+    text = _read_recipe(dish_name)
+    if text is not None:
+        return text
     else:
         return f"Sorry, the recipe for '{dish_name.replace('_', ' ')}' is not available."
 
+def _read_recipe(dish_name):
+    """Read recipe text from the packed store if one is built, else through the file cache."""
+    store = get_default_store()
+    if store is not None:
+        return store.get(dish_name)
+    return _recipe_cache.get(os.path.join(RECIPE_DIR, dish_name + ".txt"))
+
+def warm_recipe_cache(dish_names=None, top_n=None):
+    """
+    Pre-load recipes into the cache, e.g. the most requested dishes at startup.
+    dish_names should be ordered by popularity; defaults to every known recipe.
+    Returns the number of recipes loaded.
+    """
+    if dish_names is None:
+        store = get_default_store()
+        if store is not None:
+            dish_names = store.dish_names()
+        else:
+            dish_names = sorted(f[:-4] for f in os.listdir(RECIPE_DIR) if f.endswith('.txt'))
+    loaded = 0
+    for dish_name in list(dish_names)[:top_n]:
+        if _read_recipe(dish_name) is not None:
+            loaded += 1
+    return loaded
+
+def recipe_cache_stats():
+    """Return hit/miss/eviction counters and current size of the recipe cache."""
+    return _recipe_cache.stats()
+
 # Example usage
 if __name__ == "__main__":
     test_dishes = ["chicken_rice", "katong_laksa", "non_existent_dish"]
     for dish in test_dishes:
-        print(f"Recipe for {dish}:\n{get_recipe(dish)}\n{'-'*40}\n")
\ No newline at end of file
+        print(f"Recipe for {dish}:\n{get_recipe(dish)}\n{'-'*40}\n")
+    print(recipe_cache_stats())
@@ -0,0 +1,112 @@
+"""
+Precomputed CLIP text embeddings for zero-shot dish classification.
+
+The dish labels never change between requests, so their normalized text
+embeddings are computed once and saved as a .npy file in data/cache, named
+after the model, its revision and a hash of the label list. A request then
+only encodes its image: the label probabilities are one matrix product with
+the bank and a softmax, exactly what CLIP's logits_per_image would give.
+"""
+import hashlib
+import os
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from .utils import cache_path
+
+def model_revision(model) -> str:
+    """Hub commit the model was loaded from ("local" if unknown)."""
+    return getattr(model.config, "_commit_hash", None) or "local"
+
+def labels_hash(labels: List[str]) -> str:
+    return hashlib.sha1("\n".join(labels).encode("utf-8")).hexdigest()[:16]
+
+def _normalize(embeddings: np.ndarray) -> np.ndarray:
+    return embeddings / np.linalg.norm(embeddings, axis=-1, keepdims=True)
+
+def encode_texts(model, processor, texts: List[str], batch_size: int = 256) -> np.ndarray:
+    """L2-normalized CLIP text embeddings, one float32 row per text."""
+    import torch
+
+    chunks = []
+    with torch.no_grad():
+        for i in range(0, len(texts), batch_size):
+            inputs = processor(text=texts[i:i + batch_size], return_tensors="pt", padding=True, truncation=True)
+            chunks.append(model.get_text_features(**inputs).float().numpy())
+    return _normalize(np.concatenate(chunks)).astype(np.float32)
+
+def preprocess_images(processor, images) -> np.ndarray:
+    """CLIP pixel values for a list of PIL images (resize, crop, normalize), shape (n, 3, H, W)."""
+    return processor(images=images, return_tensors="np")["pixel_values"]
+
+def encode_pixels(model, pixel_values: np.ndarray) -> np.ndarray:
+    """L2-normalized CLIP image embeddings for preprocessed pixel values."""
+    import torch
+
+    with torch.no_grad():
+        features = model.get_image_features(pixel_values=torch.from_numpy(np.ascontiguousarray(pixel_values)))
+        return _normalize(features.float().numpy()).astype(np.float32)
+
+def encode_images(model, processor, images) -> np.ndarray:
+    """L2-normalized CLIP image embeddings for a list of PIL images."""
+    return encode_pixels(model, preprocess_images(processor, images))
+
+def softmax(logits: np.ndarray) -> np.ndarray:
+    logits = logits - logits.max(axis=-1, keepdims=True)
+    exp = np.exp(logits)
+    return exp / exp.sum(axis=-1, keepdims=True)
+
+class LabelBank:
+    def __init__(self, labels: List[str], embeddings: np.ndarray, logit_scale: float):
+        """
+        Args:
+            labels (List[str]): Label texts, one per embedding row
+            embeddings (np.ndarray): Normalized text embeddings, shape (len(labels), dim)
+            logit_scale (float): CLIP's learned temperature (logit_scale.exp())
+        """
+        self.labels = labels
+        self.embeddings = embeddings
+        self.logit_scale = logit_scale
+        # Identifies the label set, e.g. for caching per-image results
+        self.fingerprint = labels_hash(labels)
+
+    @classmethod
+    def build(cls, model, processor, labels: List[str], model_name: str) -> "LabelBank":
+        """Load the bank for these labels and model revision from data/cache, or compute and save it."""
+        slug = model_name.replace("/", "__")
+        path = cache_path(f"clip_labels_{slug}_{model_revision(model)[:12]}_{labels_hash(labels)}.npy")
+        embeddings = None
+        if os.path.exists(path):
+            try:
+                embeddings = np.load(path)
+            except (OSError, ValueError) as e:
+                print(f"[label_bank] Ignoring unreadable {path}: {e}")
+        if embeddings is None or embeddings.shape[0] != len(labels):
+            embeddings = encode_texts(model, processor, labels)
+            tmp_path = path + ".tmp"
+            with open(tmp_path, 'wb') as f:
+                np.save(f, embeddings)
+            os.replace(tmp_path, path)
+        return cls(labels, embeddings, float(model.logit_scale.exp().item()))
+
+    def probabilities(self, image_embeddings: np.ndarray, extra_embeddings: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Softmax over the labels for each image row. extra_embeddings (e.g. an
+        encoded user prompt) are scored as additional leading candidates.
+        """
+        bank = self.embeddings if extra_embeddings is None else np.concatenate([extra_embeddings, self.embeddings])
+        return softmax(self.logit_scale * np.atleast_2d(image_embeddings) @ bank.T)
+
+    def top_k(self, image_embeddings: np.ndarray, k: int = 5) -> List[List[Tuple[str, float]]]:
+        """Per image, the k most likely labels with their probabilities (softmax over all labels)."""
+        probs = self.probabilities(image_embeddings)
+        return [[(self.labels[i], float(row[i])) for i in np.argsort(-row)[:k]] for row in probs]
+
+    def best(self, image_embedding: np.ndarray, extra_labels: Optional[List[str]] = None,
+             extra_embeddings: Optional[np.ndarray] = None) -> Tuple[str, float]:
+        """(label, confidence) for one image, optionally with extra candidates (e.g. an encoded prompt)."""
+        candidates = (list(extra_labels) + self.labels) if extra_labels else self.labels
+        probs = self.probabilities(image_embedding, extra_embeddings if extra_labels else None)[0]
+        idx = int(probs.argmax())
+        return candidates[idx], float(probs[idx])
@@ -0,0 +1,73 @@
+"""
+Compact record for a TheMealDB meal.
+
+The API returns ~50 keys per meal, 40 of them strIngredientN/strMeasureN
+pairs that are mostly empty. Meal parses those once into parallel tuples and
+uses __slots__, so a parsed meal is a fraction of the size of the raw dict
+and formatting no longer probes 40 string-formatted keys.
+"""
+from typing import Optional, Tuple
+
+MAX_INGREDIENTS = 20
+_INGREDIENT_KEYS = tuple((f"strIngredient{i}", f"strMeasure{i}") for i in range(1, MAX_INGREDIENTS + 1))
+
+class Meal:
+    __slots__ = ("id", "name", "category", "area", "instructions", "ingredients", "measures")
+
+    def __init__(self, id: Optional[str], name: str, category: Optional[str], area: Optional[str],
+                 instructions: str, ingredients: Tuple[str, ...], measures: Tuple[str, ...]):
+        self.id = id
+        self.name = name
+        self.category = category
+        self.area = area
+        self.instructions = instructions
+        self.ingredients = ingredients
+        self.measures = measures
+
+    @classmethod
+    def from_dict(cls, meal: dict) -> "Meal":
+        """Parse a raw TheMealDB meal dict, keeping only non-empty ingredients."""
+        ingredients = []
+        measures = []
+        get = meal.get
+        for ingredient_key, measure_key in _INGREDIENT_KEYS:
+            ingredient = get(ingredient_key)
+            if ingredient and ingredient.strip():
+                ingredients.append(ingredient)
+                measures.append((get(measure_key) or "").strip())
+        return cls(
+            id=get("idMeal"),
+            name=get("strMeal") or "Unknown",
+            category=get("strCategory"),
+            area=get("strArea"),
+            instructions=get("strInstructions") or "",
+            ingredients=tuple(ingredients),
+            measures=tuple(measures),
+        )
+
+    def to_dict(self) -> dict:
+        """Back to the TheMealDB dict layout (only non-empty ingredient fields)."""
+        meal = {
+            "idMeal": self.id,
+            "strMeal": self.name,
+            "strCategory": self.category,
+            "strArea": self.area,
+            "strInstructions": self.instructions,
+        }
+        for i, (ingredient, measure) in enumerate(zip(self.ingredients, self.measures), start=1):
+            meal[f"strIngredient{i}"] = ingredient
+            meal[f"strMeasure{i}"] = measure
+        return meal
+
+    def format(self) -> str:
+        """Render the meal as recipe text."""
+        instructions = self.instructions.replace("\n", " ").strip()
+        ingredients = [f"{measure} {ingredient}".strip() for ingredient, measure in zip(self.ingredients, self.measures)]
+        return (
+            f"Recipe for {self.name}:\n\n"
+            f"Ingredients:\n" + "\n".join(f"- {ing}" for ing in ingredients) + "\n\n"
+            f"Instructions:\n{instructions}"
+        )
+
+    def __repr__(self):
+        return f"Meal(id={self.id!r}, name={self.name!r}, ingredients={len(self.ingredients)})"
@@ -1,68 +1,31 @@
 from typing import Optional
-from PIL import Image
-
-SINGAPORE_DISHES = [
-    "Hainanese chicken rice",
-    "Laksa",
-    "Char kway teow",
-    "Chilli crab",
-    "Satay",
-    "Roti prata",
-    "Bak kut teh",
-    "Nasi lemak",
-    "Kaya toast",
-    "Fish head curry",
-    "Mee siam",
-    "Chicken rice",
-    "Wanton mee",
-    "Hokkien mee",
-    "Popiah",
-    "Ice kacang",
-    "Chendol",
-    "Tau huay",
-    "Carrot cake",
-    "Otah"
-]
+
+from .label_bank import encode_texts
+from .vlm import caption_image, classify_image, image_embedding, load_image, use_clip, use_dish_classifier
 
 def infer_dish_from_image(image_path: str, prompt: Optional[str] = None) -> Optional[str]:
+    image = digest = None
     try:
-        from transformers import CLIPProcessor, CLIPModel
-        import torch
-
-        model = CLIPModel.from_pretrained("openai/clip-vit-base-patch32")
-        processor = CLIPProcessor.from_pretrained("openai/clip-vit-base-patch32")
-
-        image = Image.open(image_path).convert("RGB")
+        image, digest = load_image(image_path)
 
+        # The dish names are precomputed and the image embedding is cached; only the prompt is encoded per request
         if prompt:
-            candidate_texts = [prompt] + SINGAPORE_DISHES
+            with use_clip() as (model, processor), use_dish_classifier() as classifier:
+                best, confidence = classifier.best(
+                    image_embedding(image, digest), [prompt], encode_texts(model, processor, [prompt]))
         else:
-            candidate_texts = SINGAPORE_DISHES
-
-        inputs = processor(text=candidate_texts, images=image, return_tensors="pt", padding=True)
-        outputs = model(**inputs)
-        logits_per_image = outputs.logits_per_image
-        probs = logits_per_image.softmax(dim=1)
-
-        best_idx = probs.argmax()
-        confidence = probs[0, best_idx].item()
+            best, confidence = classify_image(image, digest)
 
         if confidence > 0.3:
-            return candidate_texts[best_idx]
+            return best
     except Exception as e:
         print(f"CLIP error: {e}")
 
     try:
-        from transformers import BlipProcessor, BlipForConditionalGeneration
-
-        processor = BlipProcessor.from_pretrained("Salesforce/blip-image-captioning-base")
-        model = BlipForConditionalGeneration.from_pretrained("Salesforce/blip-image-captioning-base")
-
-        image = Image.open(image_path).convert("RGB")
+        if image is None:
+            image, digest = load_image(image_path)
 
-        inputs = processor(image, return_tensors="pt")
-        outputs = model.generate(**inputs)
-        caption = processor.decode(outputs[0], skip_special_tokens=True)
+        caption = caption_image(image, digest)
 
         if prompt:
             combined_caption = f"{prompt}. {caption}"
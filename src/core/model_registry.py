@@ -0,0 +1,197 @@
+"""
+Process-wide registry of loaded models.
+
+Models are keyed by (kind, name, params) and loaded lazily, once per
+process: concurrent requests for a model that is still loading wait for that
+load instead of starting their own. Callers pin a model while using it
+(acquire/release or the use() context manager). When the estimated memory
+of loaded models exceeds the RSS budget, the least recently used unpinned
+models are dropped.
+
+A model's size is estimated from the growth in process RSS while it loads
+(or from its parameter sizes when RSS cannot be read), so loads that overlap
+share their estimates loosely.
+"""
+import gc
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Optional, Tuple
+
+def current_rss() -> int:
+    """Resident set size of this process in bytes (0 if it cannot be read)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except Exception:
+        return 0
+
+def parameter_bytes(value: Any) -> int:
+    """Bytes held by a model's parameters (torch/Flax), summed over tuples of models."""
+    if isinstance(value, (tuple, list)):
+        return sum(parameter_bytes(item) for item in value)
+    value = getattr(value, "model", value)  # e.g. RecipeGenerator
+    if hasattr(value, "parameters"):
+        try:
+            return sum(p.numel() * p.element_size() for p in value.parameters())
+        except Exception:
+            return 0
+    params = getattr(value, "params", None)
+    if params is not None:
+        try:
+            import jax
+            return sum(leaf.nbytes for leaf in jax.tree_util.tree_leaves(params))
+        except Exception:
+            return 0
+    return 0
+
+class _Entry:
+    __slots__ = ("value", "size", "refs", "loaded_at")
+
+    def __init__(self, value: Any, size: int):
+        self.value = value
+        self.size = size
+        self.refs = 0
+        self.loaded_at = time.time()
+
+class ModelRegistry:
+    def __init__(self, max_rss_bytes: Optional[int] = None):
+        """
+        Args:
+            max_rss_bytes (int): Budget for the estimated memory of loaded models (None: unlimited)
+        """
+        self.max_rss_bytes = max_rss_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> _Entry, least recently used first
+        self._loading = {}             # key -> lock held while that model loads
+        self.hits = 0
+        self.loads = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(kind: str, name: str, params: Optional[dict] = None) -> Tuple[str, str, Tuple]:
+        return (kind, name, tuple(sorted((params or {}).items())))
+
+    def acquire(self, kind: str, name: str, loader: Callable[[], Any], params: Optional[dict] = None) -> Any:
+        """Return the model, loading it with loader() on first use, and pin it until release()."""
+        key = self.key(kind, name, params)
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    entry.refs += 1
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry.value
+                load_lock = self._loading.setdefault(key, threading.Lock())
+
+            with load_lock:
+                with self._lock:
+                    if key in self._entries:
+                        continue  # loaded by the thread we waited for
+                try:
+                    before = current_rss()
+                    value = loader()
+                    size = max(current_rss() - before, 0) if before else parameter_bytes(value)
+                except BaseException:
+                    with self._lock:
+                        self._loading.pop(key, None)
+                    raise
+                # Publish the entry and retire the load lock together, so no caller sees neither
+                with self._lock:
+                    entry = self._entries[key] = _Entry(value, size)
+                    entry.refs += 1
+                    self.loads += 1
+                    self._loading.pop(key, None)
+                    evicted = self._evict_over_budget()
+                if evicted:
+                    gc.collect()
+                return value
+
+    def release(self, kind: str, name: str, params: Optional[dict] = None):
+        """Unpin a model acquired with acquire()."""
+        evicted = False
+        with self._lock:
+            entry = self._entries.get(self.key(kind, name, params))
+            if entry is not None and entry.refs > 0:
+                entry.refs -= 1
+                evicted = self._evict_over_budget()
+        if evicted:
+            gc.collect()
+
+    def get(self, kind: str, name: str, loader: Callable[[], Any], params: Optional[dict] = None) -> Any:
+        """Return the model without pinning it (it may be evicted while the caller still holds it)."""
+        value = self.acquire(kind, name, loader, params)
+        self.release(kind, name, params)
+        return value
+
+    @contextmanager
+    def use(self, kind: str, name: str, loader: Callable[[], Any], params: Optional[dict] = None):
+        """Pin the model for the duration of a with-block."""
+        value = self.acquire(kind, name, loader, params)
+        try:
+            yield value
+        finally:
+            self.release(kind, name, params)
+
+    def _evict_over_budget(self) -> bool:
+        """Drop unpinned models until the budget is met; called with the lock held. Returns whether any were dropped."""
+        if self.max_rss_bytes is None:
+            return False
+        total = sum(entry.size for entry in self._entries.values())
+        evicted = False
+        for key in list(self._entries):
+            if total <= self.max_rss_bytes:
+                break
+            entry = self._entries[key]
+            if entry.refs == 0:
+                total -= entry.size
+                del self._entries[key]
+                self.evictions += 1
+                evicted = True
+        # The caller collects once the lock is released, so other threads are not held up meanwhile
+        return evicted
+
+    def evict(self, kind: Optional[str] = None, name: Optional[str] = None) -> int:
+        """Drop unpinned models (all of them, or those matching kind/name). Returns how many."""
+        with self._lock:
+            keys = [key for key, entry in self._entries.items()
+                    if entry.refs == 0 and kind in (None, key[0]) and name in (None, key[1])]
+            for key in keys:
+                del self._entries[key]
+            self.evictions += len(keys)
+        if keys:
+            gc.collect()
+        return len(keys)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "loads": self.loads,
+                "evictions": self.evictions,
+                "budget_mb": self.max_rss_bytes / 2**20 if self.max_rss_bytes is not None else None,
+                "total_mb": sum(entry.size for entry in self._entries.values()) / 2**20,
+                "models": [
+                    {"kind": key[0], "name": key[1], "params": dict(key[2]),
+                     "size_mb": entry.size / 2**20, "refs": entry.refs}
+                    for key, entry in self._entries.items()
+                ],
+            }
+
+# Budget for loaded models, in MB (unset: no limit)
+_budget_mb = os.environ.get("MODEL_RSS_BUDGET_MB")
+_registry = ModelRegistry(int(float(_budget_mb) * 2**20) if _budget_mb else None)
+
+def get_registry() -> ModelRegistry:
+    return _registry
+
+def registry_stats() -> dict:
+    return _registry.stats()
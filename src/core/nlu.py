@@ -1,23 +1,86 @@
 import string
 import os
+import sys
+import json
+
+if __package__ in (None, ""):
+    # Run as a script (python src/core/nlu.py): make the src package importable
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.core.fuzzy import FuzzyVocabulary
+from src.core.phrase_matcher import PhraseMatcher
+from src.core.recipe_store import get_default_store
+from src.core.utils import DATA_DIR, cache_path
 
 RECIPE_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'data', 'recipes')
+ALIASES_PATH = os.path.join(DATA_DIR, 'dish_aliases.json')
+PHRASE_CACHE_FILE = 'dish_phrases.json'
+
+# Inverted index cache: (directory mtime, dish order, keyword -> {dish: count})
+_keyword_index = None
+# Typo-tolerant vocabulary cache: (directory mtime, FuzzyVocabulary)
+_fuzzy_vocabulary = None
+# Sparse keyword-by-dish matrix cache for batch scoring
+_keyword_matrix = None
+# Compiled phrase automaton cache: (source signature, PhraseMatcher, FuzzyVocabulary)
+_phrase_matcher = None
+
+_PUNCT_TABLE = str.maketrans('', '', string.punctuation)
 
 def normalize_text(text):
     """Lowercase and remove punctuation from text."""
     text = text.lower()
-    return text.translate(str.maketrans('', '', string.punctuation))
+    return text.translate(_PUNCT_TABLE)
 
 def load_dish_keywords():
-    """Load recipe filenames and create a dict mapping dish name to keywords list."""
+    """
+    Load recipe names (from the packed store if built, else the recipe filenames)
+    and create a dict mapping dish name to keywords list.
+    """
+    store = get_default_store()
+    if store is not None:
+        dish_names = store.dish_names()
+    else:
+        dish_names = [f[:-4] for f in os.listdir(RECIPE_DIR) if f.endswith('.txt')]  # remove .txt
     dish_keywords = {}
-    for filename in os.listdir(RECIPE_DIR):
-        if filename.endswith('.txt'):
-            dish_name = filename[:-4]  # remove .txt
-            keywords = dish_name.split('_')
-            dish_keywords[dish_name] = keywords
+    for dish_name in dish_names:
+        keywords = dish_name.split('_')
+        dish_keywords[dish_name] = keywords
     return dish_keywords
 
+def _recipes_mtime():
+    """Modification time of the recipe source: the packed store if built, else the recipe directory."""
+    store = get_default_store()
+    if store is not None:
+        return store.mtime_ns
+    return os.stat(RECIPE_DIR).st_mtime_ns
+
+def build_keyword_index(dish_keywords):
+    """
+    Build an inverted index mapping each keyword to {dish_name: count}.
+    Also returns the rank of every dish so ties resolve in load order.
+    """
+    dish_rank = {}
+    index = {}
+    for rank, (dish_name, keywords) in enumerate(dish_keywords.items()):
+        dish_rank[dish_name] = rank
+        for kw in keywords:
+            postings = index.setdefault(kw, {})
+            postings[dish_name] = postings.get(dish_name, 0) + 1
+    return dish_rank, index
+
+def get_keyword_index():
+    """
+    Return the cached (dish_rank, keyword_index) pair, rebuilding it only
+    when the recipe directory has changed since the last build.
+    """
+    global _keyword_index
+    mtime = _recipes_mtime()
+    if _keyword_index is None or _keyword_index[0] != mtime:
+        dish_rank, index = build_keyword_index(load_dish_keywords())
+        _keyword_index = (mtime, dish_rank, index)
+    return _keyword_index[1], _keyword_index[2]
+
 def find_dish_in_text(user_input):
     """
     Find the best matching dish name in user input.
@@ -26,23 +89,193 @@ def find_dish_in_text(user_input):
     normalized_input = normalize_text(user_input)
     input_words = set(normalized_input.split())
 
-    dish_keywords = load_dish_keywords()
-
-    best_match = None
-    max_matches = 0
+    dish_rank, index = get_keyword_index()
 
-    for dish_name, keywords in dish_keywords.items():
-        # Count how many keywords appear in input
-        matches = sum(1 for kw in keywords if kw in input_words)
-        if matches > max_matches:
-            max_matches = matches
-            best_match = dish_name
+    # Count how many keywords of each dish appear in input
+    scores = {}
+    for word in input_words:
+        for dish_name, count in index.get(word, {}).items():
+            scores[dish_name] = scores.get(dish_name, 0) + count
 
     # Return best match only if at least one keyword matched
-    if max_matches > 0:
-        return best_match
-    else:
+    if not scores:
+        return None
+    return max(scores, key=lambda d: (scores[d], -dish_rank[d]))
+
+def load_dish_aliases():
+    """Load the optional dish_name -> [alias phrases] mapping."""
+    if not os.path.exists(ALIASES_PATH):
+        return {}
+    with open(ALIASES_PATH, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def _source_signature():
+    """Identify the current recipe directory and alias file contents by mtime."""
+    aliases_mtime = os.stat(ALIASES_PATH).st_mtime_ns if os.path.exists(ALIASES_PATH) else 0
+    return f"{_recipes_mtime()}:{aliases_mtime}"
+
+def get_fuzzy_vocabulary():
+    """Return the cached fuzzy vocabulary over all dish keywords."""
+    global _fuzzy_vocabulary
+    mtime = _recipes_mtime()
+    if _fuzzy_vocabulary is None or _fuzzy_vocabulary[0] != mtime:
+        _, index = get_keyword_index()
+        _fuzzy_vocabulary = (mtime, FuzzyVocabulary(index.keys()))
+    return _fuzzy_vocabulary[1]
+
+def correct_words(words, vocabulary=None, keep_unmatched=False):
+    """
+    Map each word onto its closest vocabulary word (dish keywords by default).
+    Words with no close match are dropped, or kept unchanged if keep_unmatched is True.
+    """
+    if vocabulary is None:
+        vocabulary = get_fuzzy_vocabulary()
+    corrected = []
+    for word in words:
+        match = vocabulary.lookup(word)
+        if match:
+            corrected.append(match[0])
+        elif keep_unmatched:
+            corrected.append(word)
+    return corrected
+
+def find_dish_in_text_fuzzy(user_input):
+    """
+    Typo-tolerant version of find_dish_in_text (e.g. "laksaa", "char kuey teow").
+    Returns dish_name or None.
+    """
+    dish = find_dish_in_text(user_input)
+    if dish:
+        return dish
+    words = correct_words(normalize_text(user_input).split())
+    return find_dish_in_text(" ".join(words)) if words else None
+
+def get_keyword_matrix():
+    """
+    Return (keyword_ids, dish_names, matrix) where matrix is a scipy CSR
+    matrix of shape (keywords, dishes) holding keyword counts per dish.
+    """
+    global _keyword_matrix
+    import numpy as np
+    from scipy import sparse
+
+    mtime = _recipes_mtime()
+    if _keyword_matrix is None or _keyword_matrix[0] != mtime:
+        dish_rank, index = get_keyword_index()
+        dish_names = sorted(dish_rank, key=dish_rank.get)
+        keyword_ids = {kw: i for i, kw in enumerate(index)}
+        rows, cols, counts = [], [], []
+        for kw, postings in index.items():
+            for dish_name, count in postings.items():
+                rows.append(keyword_ids[kw])
+                cols.append(dish_rank[dish_name])
+                counts.append(count)
+        matrix = sparse.csr_matrix(
+            (np.array(counts, dtype=np.int32), (rows, cols)),
+            shape=(len(keyword_ids), len(dish_names)),
+        )
+        _keyword_matrix = (mtime, keyword_ids, dish_names, matrix)
+    return _keyword_matrix[1], _keyword_matrix[2], _keyword_matrix[3]
+
+def find_dishes_in_texts(texts):
+    """
+    Batch version of find_dish_in_text.
+    Scores every text against every dish with one sparse matrix product and
+    returns a list of (dish_name or None, score) in input order.
+    """
+    import numpy as np
+    from scipy import sparse
+
+    keyword_ids, dish_names, matrix = get_keyword_matrix()
+    if not texts or not dish_names:
+        return [(None, 0) for _ in texts]
+
+    # Binary query-by-keyword matrix (each keyword counted once per text,
+    # matching the set() semantics of find_dish_in_text)
+    indptr = [0]
+    indices = []
+    lookup = keyword_ids.get
+    for text in texts:
+        ids = {lookup(w) for w in text.lower().translate(_PUNCT_TABLE).split()}
+        ids.discard(None)
+        indices.extend(ids)
+        indptr.append(len(indices))
+    queries = sparse.csr_matrix(
+        (np.ones(len(indices), dtype=np.int32), np.array(indices, dtype=np.int64), np.array(indptr)),
+        shape=(len(texts), len(keyword_ids)),
+    )
+
+    scores = (queries @ matrix).tocsr()
+    # argmax returns the first (lowest ranked) dish on ties, like find_dish_in_text
+    best = np.asarray(scores.argmax(axis=1)).ravel()
+    best_scores = np.asarray(scores.max(axis=1).todense()).ravel()
+    return [
+        (dish_names[idx] if score > 0 else None, int(score))
+        for idx, score in zip(best.tolist(), best_scores.tolist())
+    ]
+
+def build_phrase_matcher():
+    """Compile an automaton over every dish phrase (from filenames) and its aliases."""
+    matcher = PhraseMatcher()
+    for dish_name in load_dish_keywords():
+        matcher.add(normalize_text(dish_name.replace('_', ' ')), dish_name)
+    for dish_name, aliases in load_dish_aliases().items():
+        for alias in aliases:
+            matcher.add(normalize_text(alias), dish_name)
+    return matcher.build()
+
+def _load_phrase_matcher():
+    """Refresh the cached automaton (from data/cache if the saved copy is current)."""
+    global _phrase_matcher
+    signature = _source_signature()
+    if _phrase_matcher is None or _phrase_matcher[0] != signature:
+        path = cache_path(PHRASE_CACHE_FILE)
+        matcher = PhraseMatcher.load(path, signature)
+        if matcher is None:
+            matcher = build_phrase_matcher()
+            try:
+                matcher.save(path, signature)
+            except OSError as e:
+                print(f"[nlu.get_phrase_matcher] Could not save automaton: {e}")
+        vocabulary = FuzzyVocabulary(word for state in matcher.goto for word in state)
+        _phrase_matcher = (signature, matcher, vocabulary)
+    return _phrase_matcher
+
+def get_phrase_matcher():
+    """
+    Return the compiled phrase automaton. It is loaded from data/cache when the
+    saved copy matches the current sources, and rebuilt and saved otherwise.
+    """
+    return _load_phrase_matcher()[1]
+
+def get_phrase_vocabulary():
+    """Return the fuzzy vocabulary over every word used in dish phrases and aliases."""
+    return _load_phrase_matcher()[2]
+
+def find_dish_phrases(user_input):
+    """
+    Return all dish names whose full phrase or alias occurs in user input, in
+    order of appearance. Overlapping occurrences resolve to the longest phrase.
+    """
+    words = normalize_text(user_input).split()
+    return [dish for _, _, dish in get_phrase_matcher().find_longest(words)]
+
+def match_dish(user_input):
+    """
+    Find the dish named in user input by whole phrase, retrying with typo
+    correction if nothing matches. When several dishes are named, the longest
+    phrase wins. Returns dish_name or None.
+    """
+    words = normalize_text(user_input).split()
+    matcher = get_phrase_matcher()
+    matches = matcher.find_longest(words)
+    if not matches:
+        corrected = correct_words(words, vocabulary=get_phrase_vocabulary(), keep_unmatched=True)
+        matches = matcher.find_longest(corrected)
+    if not matches:
         return None
+    start, end, dish = max(matches, key=lambda m: (m[1] - m[0], -m[0]))
+    return dish
 
 # Example usage
 if __name__ == "__main__":
@@ -55,4 +288,9 @@ if __name__ == "__main__":
     ]
     for sentence in test_sentences:
         dish = find_dish_in_text(sentence)
-        print(f"Input: {sentence}\nMatched dish: {dish}\n")
\ No newline at end of file
+        print(f"Input: {sentence}\nMatched dish: {dish}\n")
+    for sentence in ["How do I cook laksaa?", "Recipe for chilli crabs"]:
+        dish = find_dish_in_text_fuzzy(sentence)
+        print(f"Input: {sentence}\nFuzzy matched dish: {dish}\n")
+    for sentence in ["Something with chicken", "Hainanese chicken rice or char kuey teow?"]:
+        print(f"Input: {sentence}\nPhrase matches: {find_dish_phrases(sentence)}\n")
\ No newline at end of file
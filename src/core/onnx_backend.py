@@ -0,0 +1,90 @@
+"""
+ONNX Runtime backend for the T5 recipe model.
+
+The model is exported once with Hugging Face Optimum (encoder, decoder and
+decoder-with-past, so generation reuses the KV cache) into data/cache/onnx,
+optionally quantized to int8 with dynamic quantization, and loaded as an
+ORTModelForSeq2SeqLM. That model has the same generate() interface as the
+PyTorch one, so RecipeGenerator drives it like the PyTorch path.
+"""
+import os
+import platform
+
+from .utils import cache_path
+
+ONNX_DIR = cache_path('onnx')
+
+def onnx_model_dir(model_name: str, quantize: bool = False) -> str:
+    return os.path.join(ONNX_DIR, model_name.replace("/", "__") + ("-int8" if quantize else ""))
+
+def _decoder_file_kwargs(directory: str, suffix: str = "") -> dict:
+    """File names of the exported graphs in `directory` (Optimum's from_pretrained arguments)."""
+    kwargs = {}
+    for arg, stem in (("encoder_file_name", "encoder_model"),
+                      ("decoder_file_name", "decoder_model"),
+                      ("decoder_with_past_file_name", "decoder_with_past_model")):
+        file_name = f"{stem}{suffix}.onnx"
+        if os.path.exists(os.path.join(directory, file_name)):
+            kwargs[arg] = file_name
+    return kwargs
+
+def export_onnx_model(model_name: str) -> str:
+    """Export the model to ONNX (if not done already) and return the export directory."""
+    from optimum.onnxruntime import ORTModelForSeq2SeqLM
+
+    export_dir = onnx_model_dir(model_name)
+    if not os.path.exists(os.path.join(export_dir, "config.json")):
+        model = ORTModelForSeq2SeqLM.from_pretrained(model_name, export=True, use_cache=True, use_merged=False)
+        model.save_pretrained(export_dir)
+    return export_dir
+
+def quantize_onnx_model(model_name: str) -> str:
+    """Dynamic int8 quantization of every exported graph. Returns the quantized model directory."""
+    from optimum.onnxruntime import ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    from transformers import AutoConfig
+
+    export_dir = export_onnx_model(model_name)
+    int8_dir = onnx_model_dir(model_name, quantize=True)
+    if os.path.exists(os.path.join(int8_dir, "config.json")):
+        return int8_dir
+
+    if platform.machine().lower() in ("arm64", "aarch64"):
+        qconfig = AutoQuantizationConfig.arm64(is_static=False, per_channel=False)
+    else:
+        qconfig = AutoQuantizationConfig.avx512_vnni(is_static=False, per_channel=False)
+    for file_name in _decoder_file_kwargs(export_dir).values():
+        quantizer = ORTQuantizer.from_pretrained(export_dir, file_name=file_name)
+        quantizer.quantize(save_dir=int8_dir, quantization_config=qconfig)
+    # Written last: its presence marks a complete quantized export
+    AutoConfig.from_pretrained(export_dir).save_pretrained(int8_dir)
+    return int8_dir
+
+def load_onnx_model(model_name: str, quantize: bool = False, num_threads: int = None):
+    """
+    Load the ONNX Runtime model, exporting/quantizing it on first use.
+
+    Args:
+        model_name (str): The Hugging Face model identifier
+        quantize (bool): Use the dynamically int8-quantized graphs
+        num_threads (int): ONNX Runtime intra-op threads (default: its own choice)
+    """
+    import onnxruntime
+    from optimum.onnxruntime import ORTModelForSeq2SeqLM
+
+    if quantize:
+        model_dir, suffix = quantize_onnx_model(model_name), "_quantized"
+    else:
+        model_dir, suffix = export_onnx_model(model_name), ""
+
+    session_options = onnxruntime.SessionOptions()
+    session_options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+    if num_threads:
+        session_options.intra_op_num_threads = num_threads
+    return ORTModelForSeq2SeqLM.from_pretrained(
+        model_dir,
+        use_cache=True,
+        provider="CPUExecutionProvider",
+        session_options=session_options,
+        **_decoder_file_kwargs(model_dir, suffix),
+    )
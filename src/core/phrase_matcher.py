@@ -0,0 +1,113 @@
+"""
+Aho-Corasick matcher over whole dish phrases (e.g. "char kway teow").
+
+The automaton works on words rather than characters, so matches always fall
+on word boundaries. Scanning an input costs O(words in the input + matches)
+regardless of how many phrases were added.
+"""
+import json
+from collections import deque
+from typing import Dict, List, Tuple
+
+class PhraseMatcher:
+    def __init__(self):
+        # State 0 is the root. goto[s] maps a word to the next state.
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        # outputs[s] lists (phrase length in words, dish name) ending at state s
+        self.outputs: List[List[Tuple[int, str]]] = [[]]
+        self._built = False
+
+    def add(self, phrase: str, dish_name: str):
+        """Add a normalized phrase that should match dish_name."""
+        words = phrase.split()
+        if not words:
+            return
+        state = 0
+        for word in words:
+            nxt = self.goto[state].get(word)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto[state][word] = nxt
+                self.goto.append({})
+                self.fail.append(0)
+                self.outputs.append([])
+            state = nxt
+        if (len(words), dish_name) not in self.outputs[state]:
+            self.outputs[state].append((len(words), dish_name))
+        self._built = False
+
+    def build(self):
+        """Compute failure links and merge outputs along them (breadth-first)."""
+        queue = deque()
+        for state in self.goto[0].values():
+            self.fail[state] = 0
+            queue.append(state)
+        while queue:
+            state = queue.popleft()
+            for word, nxt in self.goto[state].items():
+                queue.append(nxt)
+                f = self.fail[state]
+                while f and word not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[nxt] = self.goto[f].get(word, 0)
+                self.outputs[nxt] = self.outputs[nxt] + [
+                    out for out in self.outputs[self.fail[nxt]] if out not in self.outputs[nxt]
+                ]
+        self._built = True
+        return self
+
+    def find_all(self, words: List[str]) -> List[Tuple[int, int, str]]:
+        """Return every (start, end, dish_name) occurrence, end exclusive."""
+        if not self._built:
+            self.build()
+        matches = []
+        state = 0
+        for i, word in enumerate(words):
+            while state and word not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(word, 0)
+            for length, dish_name in self.outputs[state]:
+                matches.append((i + 1 - length, i + 1, dish_name))
+        return matches
+
+    def find_longest(self, words: List[str]) -> List[Tuple[int, int, str]]:
+        """Return non-overlapping occurrences, preferring leftmost then longest."""
+        selected = []
+        next_free = 0
+        for start, end, dish_name in sorted(self.find_all(words), key=lambda m: (m[0], m[0] - m[1])):
+            if start >= next_free:
+                selected.append((start, end, dish_name))
+                next_free = end
+        return selected
+
+    def to_dict(self) -> dict:
+        if not self._built:
+            self.build()
+        return {"goto": self.goto, "fail": self.fail, "outputs": self.outputs}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "PhraseMatcher":
+        matcher = cls()
+        matcher.goto = data["goto"]
+        matcher.fail = data["fail"]
+        matcher.outputs = [[tuple(out) for out in outs] for outs in data["outputs"]]
+        matcher._built = True
+        return matcher
+
+    def save(self, path: str, signature=None):
+        """Serialize the compiled automaton to JSON, tagged with a source signature."""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({"signature": signature, "automaton": self.to_dict()}, f)
+
+    @classmethod
+    def load(cls, path: str, signature=None):
+        """Load a saved automaton, or return None if it is missing or stale."""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if data.get("signature") != signature:
+            return None
+        return cls.from_dict(data["automaton"])
@@ -0,0 +1,153 @@
+"""
+Packed recipe store: all recipes concatenated into one data file plus a JSON
+index of {dish_name: [offset, length]}. The data file is memory-mapped, so a
+lookup is a slice of the mapping rather than an open/read per dish.
+
+Each build gets a random build id, written into a short header at the start
+of the pack and into the index. A store refuses to open a pack/index pair
+whose ids (or pack size) do not match, e.g. one opened between the two
+renames of a rebuild, rather than slicing the wrong bytes. The check reads
+only the header, so opening a store stays lazy.
+
+Build it from data/recipes with src/scripts/build_recipe_pack.py. When the
+pack exists, knowledge.get_recipe and nlu.load_dish_keywords read from it.
+"""
+import os
+import json
+import mmap
+import threading
+import uuid
+from typing import Iterable, Optional
+
+from .utils import DATA_DIR
+
+RECIPE_DIR = os.path.join(DATA_DIR, 'recipes')
+PACK_PATH = os.path.join(DATA_DIR, 'recipes.pack')
+INDEX_PATH = os.path.join(DATA_DIR, 'recipes.idx')
+INDEX_VERSION = 3
+# Pack header: magic, then the 32-hex-digit build id and a newline
+PACK_MAGIC = b"RECIPEPACK\n"
+PACK_HEADER_SIZE = len(PACK_MAGIC) + 33
+
+class PackMismatchError(ValueError):
+    """The index was not built for this pack file (or is in an older format)."""
+
+class PackedRecipeStore:
+    def __init__(self, pack_path: str = PACK_PATH, index_path: str = INDEX_PATH):
+        """
+        Open a packed recipe store for reading.
+
+        Args:
+            pack_path (str): Path of the concatenated recipe data file
+            index_path (str): Path of the JSON offset/length index
+        """
+        self.pack_path = pack_path
+        self.index_path = index_path
+        with open(index_path, 'r', encoding='utf-8') as f:
+            header = json.load(f)
+        if not isinstance(header, dict) or header.get("version") != INDEX_VERSION:
+            raise PackMismatchError(f"{index_path} is in an old format; rebuild it with build_recipe_pack.py")
+        self.index = header["recipes"]
+        self._file = open(pack_path, 'rb')
+        self._mmap = b""
+        try:
+            stat = os.fstat(self._file.fileno())
+            self.mtime_ns = stat.st_mtime_ns
+            pack_header = self._file.read(PACK_HEADER_SIZE)
+            expected = PACK_MAGIC + header["build_id"].encode("ascii") + b"\n"
+            if stat.st_size != header["pack_size"] or pack_header != expected:
+                raise PackMismatchError(f"{index_path} does not belong to {pack_path}")
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except BaseException:
+            self.close()
+            raise
+
+    def get_bytes(self, dish_name: str) -> Optional[memoryview]:
+        """Return a zero-copy view of the recipe's UTF-8 bytes, or None."""
+        entry = self.index.get(dish_name)
+        if entry is None:
+            return None
+        offset, length = entry
+        return memoryview(self._mmap)[offset:offset + length]
+
+    def get(self, dish_name: str) -> Optional[str]:
+        """Return the recipe text, or None if the dish is not in the store."""
+        data = self.get_bytes(dish_name)
+        if data is None:
+            return None
+        return str(data, 'utf-8')
+
+    def dish_names(self):
+        return list(self.index.keys())
+
+    def __contains__(self, dish_name):
+        return dish_name in self.index
+
+    def __len__(self):
+        return len(self.index)
+
+    def close(self):
+        if isinstance(self._mmap, mmap.mmap):
+            self._mmap.close()
+        self._file.close()
+
+def build_recipe_pack(recipe_dir: str = RECIPE_DIR, pack_path: str = PACK_PATH,
+                      index_path: str = INDEX_PATH, dish_names: Optional[Iterable[str]] = None) -> int:
+    """
+    Pack every <dish_name>.txt file of recipe_dir into pack_path/index_path.
+    Files are written to temporary names first and swapped in atomically.
+    Returns the number of recipes packed.
+    """
+    if dish_names is None:
+        dish_names = sorted(f[:-4] for f in os.listdir(recipe_dir) if f.endswith('.txt'))
+
+    index = {}
+    build_id = uuid.uuid4().hex
+    tmp_pack = pack_path + '.tmp'
+    tmp_index = index_path + '.tmp'
+    with open(tmp_pack, 'wb') as out:
+        out.write(PACK_MAGIC + build_id.encode("ascii") + b"\n")
+        offset = PACK_HEADER_SIZE
+        for dish_name in dish_names:
+            with open(os.path.join(recipe_dir, dish_name + '.txt'), 'rb') as f:
+                data = f.read()
+            out.write(data)
+            index[dish_name] = [offset, len(data)]
+            offset += len(data)
+    with open(tmp_index, 'w', encoding='utf-8') as f:
+        json.dump({"version": INDEX_VERSION, "build_id": build_id, "pack_size": offset, "recipes": index}, f)
+    # Replace the index first: the store is reopened when the pack mtime changes, and a
+    # store opened in between sees a mismatched pair and is refused
+    os.replace(tmp_index, index_path)
+    os.replace(tmp_pack, pack_path)
+    return len(index)
+
+_default_store = None
+_default_store_lock = threading.Lock()
+# Pack mtime whose index did not match, so it is neither reopened nor reported again
+_rejected_mtime = None
+
+def get_default_store() -> Optional[PackedRecipeStore]:
+    """
+    Return the store at PACK_PATH, or None if no pack has been built.
+    The store is reopened when the pack file is rebuilt.
+    """
+    global _default_store, _rejected_mtime
+    try:
+        mtime = os.stat(PACK_PATH).st_mtime_ns
+    except OSError:
+        return None
+    with _default_store_lock:
+        if mtime == _rejected_mtime:
+            # Already found not to match its index; wait for the next rebuild
+            return _default_store
+        if _default_store is None or _default_store.mtime_ns != mtime:
+            try:
+                # Leave the previous mapping to the garbage collector: other
+                # threads may still hold views into it.
+                _default_store = PackedRecipeStore()
+            except (OSError, KeyError, ValueError) as e:  # ValueError covers PackMismatchError
+                # Mid-rebuild or stale index: keep serving the previous store (or the files)
+                _rejected_mtime = mtime
+                print(f"[recipe_store] Not using the recipe pack: {e}")
+        return _default_store
@@ -0,0 +1,275 @@
+"""
+BM25 full-text search over recipe bodies.
+
+The inverted index is kept in memory, saved to data/cache/recipe_search.pkl,
+and updated incrementally: only recipes that were added, changed or removed
+since the last save are (re)indexed. Removed documents leave unused ids behind;
+once they make up COMPACT_FRACTION of all ids the index is renumbered. Postings
+are frozen into numpy arrays for querying, so scoring a term is a vectorized
+operation over its postings.
+"""
+import os
+import sys
+import re
+import math
+import pickle
+import threading
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+if __package__ in (None, ""):
+    # Run as a script (python src/core/search.py): make the src package importable
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.core.recipe_store import RECIPE_DIR, get_default_store
+from src.core.utils import cache_path
+
+SEARCH_INDEX_FILE = 'recipe_search.pkl'
+SEARCH_INDEX_VERSION = 2
+
+# Share of removed doc ids at which the index is renumbered
+COMPACT_FRACTION = 0.25
+
+# BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "do", "for", "from", "how",
+    "i", "in", "is", "it", "me", "my", "of", "on", "or", "some", "something", "that",
+    "the", "then", "this", "to", "until", "want", "what", "with", "you", "your", "youll",
+    "recipe", "cook", "make", "need", "please",
+}
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+def _stem(word: str) -> str:
+    """Very light plural stripping so "prawns" matches "prawn"."""
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase, split into alphanumeric words, drop stopwords and strip plurals."""
+    text = text.lower().replace("'", "")
+    return [_stem(w) for w in _TOKEN_RE.findall(text) if w not in STOPWORDS]
+
+class RecipeSearchIndex:
+    def __init__(self):
+        self.doc_names: List[Optional[str]] = []   # doc id -> dish name (None once removed)
+        self.doc_lengths: List[int] = []
+        self.doc_terms: List[Dict[str, int]] = []  # doc id -> {term: tf}, used for removal
+        self.doc_ids: Dict[str, int] = {}          # dish name -> doc id
+        self.doc_versions: Dict[str, object] = {}  # dish name -> version seen at indexing
+        self.postings: Dict[str, Dict[int, int]] = {}
+        self.total_length = 0
+        self.source_signature = None
+        self._frozen = None
+
+    def __len__(self):
+        return len(self.doc_ids)
+
+    def add_document(self, dish_name: str, text: str, version=None) -> bool:
+        """Index (or re-index) a recipe. Returns False if this version is already indexed."""
+        if dish_name in self.doc_ids:
+            if version is not None and self.doc_versions.get(dish_name) == version:
+                return False
+            self.remove_document(dish_name)
+
+        terms: Dict[str, int] = {}
+        tokens = tokenize(text)
+        for token in tokens:
+            terms[token] = terms.get(token, 0) + 1
+
+        doc_id = len(self.doc_names)
+        self.doc_names.append(dish_name)
+        self.doc_lengths.append(len(tokens))
+        self.doc_terms.append(terms)
+        self.doc_ids[dish_name] = doc_id
+        self.doc_versions[dish_name] = version
+        for term, tf in terms.items():
+            self.postings.setdefault(term, {})[doc_id] = tf
+        self.total_length += len(tokens)
+        self._frozen = None
+        return True
+
+    def remove_document(self, dish_name: str) -> bool:
+        doc_id = self.doc_ids.pop(dish_name, None)
+        if doc_id is None:
+            return False
+        self.doc_versions.pop(dish_name, None)
+        for term in self.doc_terms[doc_id]:
+            postings = self.postings.get(term)
+            if postings is not None:
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self.postings[term]
+        self.total_length -= self.doc_lengths[doc_id]
+        self.doc_names[doc_id] = None
+        self.doc_terms[doc_id] = {}
+        self.doc_lengths[doc_id] = 0
+        self._frozen = None
+        return True
+
+    def compact(self) -> bool:
+        """Renumber documents to drop the ids of removed ones. Returns False if there were none."""
+        if len(self.doc_ids) == len(self.doc_names):
+            return False
+        new_ids = {}
+        names, lengths, doc_terms = [], [], []
+        for old_id, name in enumerate(self.doc_names):
+            if name is not None:
+                new_ids[old_id] = len(names)
+                names.append(name)
+                lengths.append(self.doc_lengths[old_id])
+                doc_terms.append(self.doc_terms[old_id])
+        self.doc_names, self.doc_lengths, self.doc_terms = names, lengths, doc_terms
+        self.doc_ids = {name: doc_id for doc_id, name in enumerate(names)}
+        self.postings = {term: {new_ids[doc_id]: tf for doc_id, tf in p.items()} for term, p in self.postings.items()}
+        self._frozen = None
+        return True
+
+    def _freeze(self):
+        """Convert postings to numpy arrays for fast scoring; cached until the next change."""
+        if self._frozen is None:
+            arrays = {
+                term: (np.fromiter(p.keys(), dtype=np.int64, count=len(p)),
+                       np.fromiter(p.values(), dtype=np.float32, count=len(p)))
+                for term, p in self.postings.items()
+            }
+            avg_length = self.total_length / max(len(self.doc_ids), 1)
+            lengths = np.asarray(self.doc_lengths, dtype=np.float32)
+            # Per-document BM25 length normalization term
+            norms = BM25_K1 * (1 - BM25_B + BM25_B * lengths / max(avg_length, 1e-9))
+            self._frozen = (arrays, norms)
+        return self._frozen
+
+    def search(self, query: str, k: int = 10) -> List[Tuple[str, float]]:
+        """Return up to k (dish_name, bm25_score) pairs, best first."""
+        terms = set(tokenize(query))
+        n_docs = len(self.doc_ids)
+        if not terms or not n_docs:
+            return []
+        arrays, norms = self._freeze()
+
+        scores = np.zeros(len(self.doc_names), dtype=np.float32)
+        candidates = []
+        for term in terms:
+            entry = arrays.get(term)
+            if entry is None:
+                continue
+            ids, tfs = entry
+            idf = math.log(1 + (n_docs - len(ids) + 0.5) / (len(ids) + 0.5))
+            scores[ids] += idf * tfs * (BM25_K1 + 1) / (tfs + norms[ids])
+            candidates.append(ids)
+        if not candidates:
+            return []
+
+        candidates = np.unique(np.concatenate(candidates)) if len(candidates) > 1 else candidates[0]
+        candidate_scores = scores[candidates]
+        if len(candidates) > k:
+            top = np.argpartition(-candidate_scores, k - 1)[:k]
+        else:
+            top = np.arange(len(candidates))
+        top = top[np.argsort(-candidate_scores[top], kind="stable")]
+        return [(self.doc_names[candidates[i]], float(candidate_scores[i])) for i in top]
+
+    def update_from_source(self) -> bool:
+        """
+        Bring the index in line with the recipe source (packed store or data/recipes),
+        indexing only new or changed recipes. Returns True if anything changed.
+        """
+        changed = False
+        store = get_default_store()
+        if store is not None:
+            # Offsets move whenever the pack is rebuilt, so compare each recipe's length and checksum
+            current = {name: (len(data), zlib.crc32(data))
+                       for name in store.dish_names() for data in (store.get_bytes(name),)}
+            read = store.get
+        else:
+            current = {}
+            for entry in os.scandir(RECIPE_DIR):
+                if entry.name.endswith('.txt'):
+                    st = entry.stat()
+                    current[entry.name[:-4]] = (st.st_mtime_ns, st.st_size)
+
+            def read(dish_name):
+                with open(os.path.join(RECIPE_DIR, dish_name + '.txt'), 'r', encoding='utf-8') as f:
+                    return f.read()
+
+        for dish_name in list(self.doc_ids):
+            if dish_name not in current:
+                changed |= self.remove_document(dish_name)
+        for dish_name, version in current.items():
+            if self.doc_versions.get(dish_name) != version or dish_name not in self.doc_ids:
+                text = read(dish_name)
+                if text is not None:
+                    changed |= self.add_document(dish_name, text, version)
+        if len(self.doc_names) - len(self.doc_ids) > COMPACT_FRACTION * len(self.doc_names):
+            self.compact()
+        return changed
+
+    def save(self, path: str):
+        state = {k: v for k, v in self.__dict__.items() if k != "_frozen"}
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump({"version": SEARCH_INDEX_VERSION, "state": state}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["RecipeSearchIndex"]:
+        try:
+            with open(path, 'rb') as f:
+                data = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+        if data.get("version") != SEARCH_INDEX_VERSION:
+            return None
+        index = cls()
+        index.__dict__.update(data["state"])
+        return index
+
+def _source_signature():
+    store = get_default_store()
+    if store is not None:
+        return ("pack", store.mtime_ns)
+    return ("dir", os.stat(RECIPE_DIR).st_mtime_ns)
+
+_search_index = None
+_search_index_lock = threading.Lock()
+
+def get_search_index(force_refresh: bool = False) -> RecipeSearchIndex:
+    """
+    Return the shared search index, loading it from data/cache on first use.
+    It is re-synced with the recipe source when the source signature changes
+    (a file added/removed or the pack rebuilt) or when force_refresh is set,
+    which also catches in-place edits of individual recipe files.
+    """
+    global _search_index
+    with _search_index_lock:
+        path = cache_path(SEARCH_INDEX_FILE)
+        if _search_index is None:
+            _search_index = RecipeSearchIndex.load(path) or RecipeSearchIndex()
+        signature = _source_signature()
+        if force_refresh or _search_index.source_signature != signature:
+            changed = _search_index.update_from_source()
+            _search_index.source_signature = signature
+            try:
+                _search_index.save(path)
+            except OSError as e:
+                if changed:
+                    print(f"[search.get_search_index] Could not save index: {e}")
+        return _search_index
+
+def search_recipes(query: str, k: int = 10) -> List[Tuple[str, float]]:
+    """Return the top-k (dish_name, score) recipes for a free-text query."""
+    return get_search_index().search(query, k)
+
+# Example usage
+if __name__ == "__main__":
+    for q in ["something with coconut milk and prawns", "pork ribs garlic", "crab with egg", "pizza"]:
+        print(f"Query: {q}\nResults: {search_recipes(q, k=3)}\n")
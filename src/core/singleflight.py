@@ -0,0 +1,103 @@
+"""
+Request coalescing ("single-flight").
+
+While a call for a key is in flight, other callers asking for the same key
+wait for that call and share its result (or exception) instead of starting
+their own. SingleFlight serves threads through do() and coroutines through
+do_async().
+
+A coroutine's call runs on its event loop, so it is only shared with
+coroutines on that loop; a thread's call can be joined by anyone. do() only
+joins thread calls, so a synchronous caller on an event-loop thread never
+waits on a task that needs its own loop (it still blocks the loop for as
+long as the call takes, as running fn() would).
+"""
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+class _Call:
+    __slots__ = ("future",)
+
+    def __init__(self):
+        # A concurrent Future, so both threads and event loops can wait on it; marked
+        # running so that no waiter can cancel it for the others
+        self.future = Future()
+        self.future.set_running_or_notify_cancel()
+
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Tuple[Any, Hashable], _Call] = {}  # (event loop or None for threads, key)
+        self._tasks = set()  # async calls in flight; the event loop only keeps weak references
+        self.calls = 0       # calls that actually ran fn
+        self.coalesced = 0   # callers that reused an in-flight call
+
+    def _join(self, key: Hashable, loop=None) -> Tuple[_Call, bool]:
+        """
+        The in-flight call for key, and whether the caller has to run it.
+        Coroutines (loop given) may join a thread's call or one on their own loop.
+        """
+        with self._lock:
+            call = self._calls.get((None, key))
+            if call is None and loop is not None:
+                call = self._calls.get((loop, key))
+            if call is not None:
+                self.coalesced += 1
+                return call, False
+            call = self._calls[(loop, key)] = _Call()
+            self.calls += 1
+            return call, True
+
+    def _finish(self, key: Hashable, loop=None):
+        with self._lock:
+            del self._calls[(loop, key)]
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """Run fn() for key, or wait for the identical call already running in another thread."""
+        call, leader = self._join(key)
+        if not leader:
+            return call.future.result()
+
+        try:
+            result = fn()
+            call.future.set_result(result)
+            return result
+        except BaseException as e:
+            call.future.set_exception(e)
+            raise
+        finally:
+            self._finish(key)
+
+    async def do_async(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Await fn() for key, or the identical call already in flight in a
+        thread or on this event loop. The shared call runs as its own task, so
+        a cancelled caller does not cancel it for the others.
+        """
+        loop = asyncio.get_running_loop()
+        call, leader = self._join(key, loop)
+        if leader:
+            def done(task: asyncio.Task):
+                self._tasks.discard(task)
+                if task.cancelled():
+                    call.future.set_exception(asyncio.CancelledError())
+                elif task.exception() is not None:
+                    call.future.set_exception(task.exception())
+                else:
+                    call.future.set_result(task.result())
+                self._finish(key, loop)
+
+            task = loop.create_task(fn())
+            self._tasks.add(task)
+            task.add_done_callback(done)
+        return await asyncio.shield(asyncio.wrap_future(call.future))
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"calls": self.calls, "coalesced": self.coalesced, "in_flight": len(self._calls)}
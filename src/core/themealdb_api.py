@@ -1,4 +1,259 @@
+import os
+import time
+import threading
+from collections import deque
+from typing import List, Optional
+
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .cache_store import SharedCache
+from .themealdb_cache import MealCache, FRESH, STALE, normalize_key
+from .singleflight import SingleFlight
+from .themealdb_mirror import get_mirror
+from .meal import Meal
+
+# Override to point the client at a local stand-in (see src/scripts/mock_themealdb.py)
+THEMEALDB_BASE_URL = os.environ.get("THEMEALDB_BASE_URL", "https://www.themealdb.com/api/json/v1/1")
+
+# Default connection settings
+POOL_SIZE = 10
+MAX_RETRIES = 3
+BACKOFF_FACTOR = 0.3
+CONNECT_TIMEOUT = 3.05
+READ_TIMEOUT = 10
+
+# Serve only from the local cache, never touching the network
+OFFLINE_MODE = os.environ.get("THEMEALDB_OFFLINE", "").lower() in ("1", "true", "yes")
+
+class TheMealDBStatusError(Exception):
+    def __init__(self, status_code: int):
+        super().__init__(f"Received status code {status_code}")
+        self.status_code = status_code
+
+class TheMealDBOfflineError(Exception):
+    pass
+
+class TheMealDBClient:
+    def __init__(self, base_url: str = THEMEALDB_BASE_URL, pool_size: int = POOL_SIZE,
+                 max_retries: int = MAX_RETRIES, backoff_factor: float = BACKOFF_FACTOR,
+                 connect_timeout: float = CONNECT_TIMEOUT, read_timeout: float = READ_TIMEOUT):
+        """
+        HTTP client for TheMealDB that reuses pooled keep-alive connections.
+
+        Args:
+            base_url (str): API root, e.g. https://www.themealdb.com/api/json/v1/1
+            pool_size (int): Maximum number of connections kept open per host
+            max_retries (int): Retries for connection errors and 429/5xx responses
+            backoff_factor (float): Exponential backoff base between retries, in seconds
+            connect_timeout (float): Seconds to wait for the TCP/TLS connection
+            read_timeout (float): Seconds to wait for the response
+        """
+        self.base_url = base_url.rstrip("/")
+        self.timeout = (connect_timeout, read_timeout)
+
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=("GET",),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.headers.update({"Connection": "keep-alive"})
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._lock = threading.Lock()
+        self.request_count = 0
+        self.error_count = 0
+        self.total_latency = 0.0
+        self._latencies = deque(maxlen=1000)
+
+    def get(self, endpoint: str, params: dict = None) -> requests.Response:
+        """GET base_url/endpoint and record its latency (including retries)."""
+        start = time.perf_counter()
+        try:
+            return self.session.get(f"{self.base_url}/{endpoint}", params=params, timeout=self.timeout)
+        except requests.RequestException:
+            with self._lock:
+                self.error_count += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.request_count += 1
+                self.total_latency += elapsed
+                self._latencies.append(elapsed)
+
+    def stats(self) -> dict:
+        """Request count, error count and latency percentiles (ms) over the last 1000 requests."""
+        with self._lock:
+            latencies = sorted(self._latencies)
+            count, errors, total = self.request_count, self.error_count, self.total_latency
+
+        def pct(p):
+            if not latencies:
+                return None
+            return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+
+        return {
+            "requests": count,
+            "errors": errors,
+            "mean_ms": total / count * 1000 if count else None,
+            "p50_ms": pct(0.50),
+            "p95_ms": pct(0.95),
+            "max_ms": latencies[-1] * 1000 if latencies else None,
+        }
+
+    def close(self):
+        self.session.close()
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_client() -> TheMealDBClient:
+    """Return the shared module-level client, creating it on first use."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = TheMealDBClient()
+        return _client
+
+def configure_client(**kwargs) -> TheMealDBClient:
+    """Replace the shared client with one built from TheMealDBClient keyword arguments."""
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+        _client = TheMealDBClient(**kwargs)
+        return _client
+
+def client_stats() -> dict:
+    return get_client().stats()
+
+_shared_cache = SharedCache(MealCache, "themealdb_api")
+# Guards _refreshing
+_cache_lock = threading.Lock()
+_refreshing = set()
+
+# Coalesces concurrent network fetches for the same normalized dish name, from
+# threads and from asyncio clients alike
+_singleflight = SingleFlight()
+
+def get_cache():
+    """
+    Return the shared response cache, or None if caching is disabled. If the
+    cache cannot be opened (e.g. a read-only data directory), caching is
+    disabled and lookups go to the network uncached.
+    """
+    return _shared_cache.get()
+
+def configure_cache(enabled: bool = True, **kwargs):
+    """Replace the shared cache with one built from MealCache keyword arguments, or disable it."""
+    return _shared_cache.configure(enabled, **kwargs)
+
+def set_offline_mode(offline: bool):
+    """When offline, searches are answered from the cache only."""
+    global OFFLINE_MODE
+    OFFLINE_MODE = offline
+
+def cache_stats() -> dict:
+    return _shared_cache.stats()
+
+def fetch_meals(dish_name: str):
+    """Search TheMealDB over the network. Returns the "meals" list, or None if nothing was found."""
+    response = get_client().get("search.php", params={"s": dish_name})
+    if response.status_code != 200:
+        raise TheMealDBStatusError(response.status_code)
+    return response.json().get("meals")
+
+def _fetch_and_store(cache, dish_name: str):
+    """
+    Fetch a dish and write it to the cache. Concurrent callers for the same
+    dish share one request.
+    """
+    def fetch():
+        meals = fetch_meals(dish_name)
+        if cache:
+            cache.put(dish_name, meals)
+        return meals
+    return _singleflight.do(normalize_key(dish_name), fetch)
+
+def get_singleflight() -> SingleFlight:
+    return _singleflight
+
+def singleflight_stats() -> dict:
+    """How many fetches ran and how many callers (sync or async) were coalesced onto an in-flight fetch."""
+    return _singleflight.stats()
+
+def _refresh_in_background(cache, dish_name: str):
+    """Re-fetch a stale entry on a daemon thread, at most once per dish at a time."""
+    key = normalize_key(dish_name)
+    with _cache_lock:
+        if key in _refreshing:
+            return
+        _refreshing.add(key)
+
+    def worker():
+        try:
+            _fetch_and_store(cache, dish_name)
+        except Exception as e:
+            print(f"[themealdb_api] Background refresh of '{dish_name}' failed: {e}")
+        finally:
+            with _cache_lock:
+                _refreshing.discard(key)
+
+    threading.Thread(target=worker, daemon=True).start()
+
+def parse_meals(meals) -> Optional[List[Meal]]:
+    """Parse a raw "meals" list into Meal records (None stays None)."""
+    return [Meal.from_dict(meal) for meal in meals] if meals else meals
+
+def search_meals(dish_name: str) -> Optional[List[Meal]]:
+    """
+    Return the meals matching a dish name (None if nothing was found). The
+    local mirror is tried first, then the cache and network.
+    """
+    mirror = get_mirror()
+    if mirror is not None:
+        meals = mirror.search_by_name(dish_name)
+        if meals:
+            return meals
+    return parse_meals(_search_raw(dish_name))
+
+def _search_raw(dish_name: str):
+    """
+    Return the raw "meals" list from the cache or network. Stale cache entries
+    are served while being refreshed, and any cached entry is served if the
+    API cannot be reached.
+    """
+    cache = get_cache()
+    cached = cache.get(dish_name) if cache else None
+    if cached is not None:
+        meals, state = cached
+        if state == FRESH or OFFLINE_MODE:
+            return meals
+        if state == STALE:
+            _refresh_in_background(cache, dish_name)
+            return meals
+    if OFFLINE_MODE:
+        raise TheMealDBOfflineError("TheMealDB offline mode: dish not in cache")
+
+    try:
+        return _fetch_and_store(cache, dish_name)
+    except (requests.RequestException, TheMealDBStatusError):
+        if cached is not None:
+            return cached[0]
+        raise
+
+def format_meal(meal) -> str:
+    """Render a Meal (or a raw TheMealDB meal dict) as recipe text."""
+    if isinstance(meal, dict):
+        meal = Meal.from_dict(meal)
+    return meal.format()
 
 def extract_dish_name(prompt: str) -> str:
     """
@@ -30,39 +285,16 @@ def query_themealdb(prompt: str, model: str = None) -> str:
         # Extract dish name from natural language prompt
         dish_name = extract_dish_name(prompt)
 
-        # TheMealDB search endpoint (no API key needed)
-        url = "https://www.themealdb.com/api/json/v1/1/search.php"
-        params = {"s": dish_name}
-
-        response = requests.get(url, params=params, timeout=10)
-        if response.status_code != 200:
-            return f"Error: Received status code {response.status_code}"
-
-        data = response.json()
-
-        meals = data.get("meals")
+        # TheMealDB search endpoint (no API key needed), through the cache
+        meals = search_meals(dish_name)
         if not meals:
             return "Sorry, I couldn't find any recipes for that."
 
-        meal = meals[0]
-
-        name = meal.get("strMeal", "Unknown")
-        instructions = meal.get("strInstructions", "").replace("\n", " ").strip()
-        ingredients = []
-
-        for i in range(1, 21):
-            ingredient = meal.get(f"strIngredient{i}")
-            measure = meal.get(f"strMeasure{i}")
-            if ingredient and ingredient.strip():
-                ingredients.append(f"{measure} {ingredient}".strip())
-
-        recipe_text = (
-            f"Recipe for {name}:\n\n"
-            f"Ingredients:\n" + "\n".join(f"- {ing}" for ing in ingredients) + "\n\n"
-            f"Instructions:\n{instructions}"
-        )
-
-        return recipe_text
+        return format_meal(meals[0])
 
+    except TheMealDBStatusError as e:
+        return f"Error: Received status code {e.status_code}"
+    except TheMealDBOfflineError:
+        return "Sorry, TheMealDB is offline and that recipe isn't cached yet."
     except Exception as e:
-        return f"Error communicating with TheMealDB: {e}"
\ No newline at end of file
+        return f"Error communicating with TheMealDB: {e}"
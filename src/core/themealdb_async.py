@@ -0,0 +1,204 @@
+"""
+Asynchronous TheMealDB client for bulk dish lookups.
+
+aquery_themealdb() is the asyncio counterpart of query_themealdb(), and
+query_many() fans a list of dish names out over at most `concurrency`
+in-flight requests, yielding results in input order. Requests share one
+aiohttp connection pool, and the response cache, formatting and single-flight
+table from themealdb_api are reused, so identical fetches coalesce with
+threaded query_themealdb callers too.
+"""
+import asyncio
+import time
+from collections import deque
+from typing import AsyncIterator, Iterable, List, Optional, Tuple
+
+import aiohttp
+
+from . import themealdb_api as api
+from .themealdb_api import (
+    TheMealDBOfflineError, TheMealDBStatusError, extract_dish_name, format_meal, parse_meals,
+    POOL_SIZE, MAX_RETRIES, BACKOFF_FACTOR, CONNECT_TIMEOUT, READ_TIMEOUT,
+)
+from .themealdb_cache import FRESH, STALE, normalize_key
+from .themealdb_mirror import get_mirror
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+class AsyncTheMealDBClient:
+    def __init__(self, base_url: Optional[str] = None, pool_size: int = POOL_SIZE,
+                 max_retries: int = MAX_RETRIES, backoff_factor: float = BACKOFF_FACTOR,
+                 connect_timeout: float = CONNECT_TIMEOUT, read_timeout: float = READ_TIMEOUT,
+                 use_cache: bool = True):
+        """
+        Same settings as themealdb_api.TheMealDBClient. Use as an async context
+        manager, or call close() when done.
+        """
+        self.base_url = (base_url or api.THEMEALDB_BASE_URL).rstrip("/")
+        self.pool_size = pool_size
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.timeout = aiohttp.ClientTimeout(sock_connect=connect_timeout, sock_read=read_timeout)
+        self.use_cache = use_cache
+        self._session = None
+        self._refreshing = set()
+        self._background = set()  # refresh tasks; the event loop only keeps weak references
+        self.request_count = 0
+        self.total_latency = 0.0
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.pool_size, limit_per_host=self.pool_size)
+            self._session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+        return self._session
+
+    async def fetch_meals(self, dish_name: str):
+        """Search TheMealDB over the network, retrying with backoff like the sync client."""
+        session = self._get_session()
+        url = f"{self.base_url}/search.php"
+        for attempt in range(self.max_retries + 1):
+            start = time.perf_counter()
+            try:
+                async with session.get(url, params={"s": dish_name}) as response:
+                    if response.status != 200:
+                        raise TheMealDBStatusError(response.status)
+                    data = await response.json(content_type=None)
+                    return data.get("meals")
+            except (aiohttp.ClientError, asyncio.TimeoutError, TheMealDBStatusError) as e:
+                retryable = not isinstance(e, TheMealDBStatusError) or e.status_code in RETRY_STATUSES
+                if not retryable or attempt == self.max_retries:
+                    raise
+                await asyncio.sleep(self.backoff_factor * (2 ** attempt))
+            finally:
+                self.request_count += 1
+                self.total_latency += time.perf_counter() - start
+
+    async def _fetch_and_store(self, cache, dish_name: str):
+        async def fetch():
+            meals = await self.fetch_meals(dish_name)
+            if cache:
+                # SQLite writes block, so they run off the event loop
+                await asyncio.to_thread(cache.put, dish_name, meals)
+            return meals
+        # The same in-flight table as the threaded client: this joins a thread's fetch or one by a
+        # client on this event loop, never one on another loop (see themealdb_api.singleflight_stats)
+        return await api.get_singleflight().do_async(normalize_key(dish_name), fetch)
+
+    def _refresh_in_background(self, cache, dish_name: str):
+        if dish_name in self._refreshing:
+            return
+        self._refreshing.add(dish_name)
+
+        async def refresh():
+            try:
+                await self._fetch_and_store(cache, dish_name)
+            except Exception as e:
+                print(f"[themealdb_async] Background refresh of '{dish_name}' failed: {e}")
+            finally:
+                self._refreshing.discard(dish_name)
+
+        task = asyncio.get_running_loop().create_task(refresh())
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def search_meals(self, dish_name: str):
+        """Async counterpart of themealdb_api.search_meals (same mirror, cache and offline rules)."""
+        mirror = get_mirror()
+        if mirror is not None:
+            meals = await asyncio.to_thread(mirror.search_by_name, dish_name)
+            if meals:
+                return meals
+        return parse_meals(await self._search_raw(dish_name))
+
+    async def _search_raw(self, dish_name: str):
+        cache = api.get_cache() if self.use_cache else None
+        cached = await asyncio.to_thread(cache.get, dish_name) if cache else None
+        if cached is not None:
+            meals, state = cached
+            if state == FRESH or api.OFFLINE_MODE:
+                return meals
+            if state == STALE:
+                self._refresh_in_background(cache, dish_name)
+                return meals
+        if api.OFFLINE_MODE:
+            raise TheMealDBOfflineError("TheMealDB offline mode: dish not in cache")
+
+        try:
+            return await self._fetch_and_store(cache, dish_name)
+        except (aiohttp.ClientError, asyncio.TimeoutError, TheMealDBStatusError):
+            if cached is not None:
+                return cached[0]
+            raise
+
+    async def query(self, prompt: str) -> str:
+        """Async counterpart of themealdb_api.query_themealdb (same replies and error strings)."""
+        try:
+            meals = await self.search_meals(extract_dish_name(prompt))
+            if not meals:
+                return "Sorry, I couldn't find any recipes for that."
+            return format_meal(meals[0])
+        except TheMealDBStatusError as e:
+            return f"Error: Received status code {e.status_code}"
+        except TheMealDBOfflineError:
+            return "Sorry, TheMealDB is offline and that recipe isn't cached yet."
+        except Exception as e:
+            return f"Error communicating with TheMealDB: {e}"
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+async def aquery_themealdb(prompt: str, model: str = None, client: Optional[AsyncTheMealDBClient] = None) -> str:
+    """
+    Async version of query_themealdb. Pass a shared client when making many
+    calls so they reuse its connections.
+    """
+    if client is not None:
+        return await client.query(prompt)
+    async with AsyncTheMealDBClient() as own_client:
+        return await own_client.query(prompt)
+
+async def query_many(prompts: Iterable[str], concurrency: int = 10,
+                     client: Optional[AsyncTheMealDBClient] = None) -> AsyncIterator[Tuple[int, str, str]]:
+    """
+    Look up many prompts with at most `concurrency` requests in flight.
+    Yields (index, prompt, reply) in input order as soon as each reply and all
+    earlier ones are ready. Only a bounded window of prompts is scheduled ahead.
+    """
+    own_client = client is None
+    if own_client:
+        client = AsyncTheMealDBClient(pool_size=max(concurrency, 1))
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(prompt):
+        async with semaphore:
+            return await client.query(prompt)
+
+    window = deque()
+    try:
+        for index, prompt in enumerate(prompts):
+            window.append((index, prompt, asyncio.ensure_future(run(prompt))))
+            if len(window) >= concurrency * 4:
+                i, p, task = window.popleft()
+                yield i, p, await task
+        while window:
+            i, p, task = window.popleft()
+            yield i, p, await task
+    finally:
+        for _, _, task in window:
+            task.cancel()
+        if own_client:
+            await client.close()
+
+def query_many_sync(prompts: Iterable[str], concurrency: int = 10, **client_kwargs) -> List[str]:
+    """Blocking helper: run query_many on a fresh event loop and return all replies in order."""
+    async def collect():
+        async with AsyncTheMealDBClient(pool_size=max(concurrency, 1), **client_kwargs) as client:
+            return [reply async for _, _, reply in query_many(prompts, concurrency, client)]
+    return asyncio.run(collect())
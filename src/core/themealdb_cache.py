@@ -0,0 +1,90 @@
+"""
+On-disk cache of TheMealDB search results (SQLite).
+
+Entries are keyed on the normalized dish name and hold the parsed "meals"
+list (or null when the API found nothing). An entry is fresh for `ttl`
+seconds. After that it may still be served for `stale_ttl` more seconds
+while it is refreshed in the background (stale-while-revalidate). The least
+recently used entries are evicted once the cache holds more than `max_entries`.
+"""
+import json
+import threading
+import time
+from typing import Optional, Tuple
+
+from .cache_store import SQLiteLRU
+from .utils import cache_path
+
+CACHE_FILE = 'themealdb.sqlite'
+DEFAULT_TTL = 24 * 3600
+DEFAULT_STALE_TTL = 7 * 24 * 3600
+DEFAULT_MAX_ENTRIES = 10000
+
+FRESH = "fresh"
+STALE = "stale"
+EXPIRED = "expired"
+
+def normalize_key(dish_name: str) -> str:
+    """Lowercase and collapse whitespace so equivalent queries share an entry."""
+    return " ".join(dish_name.lower().split())
+
+class MealCache:
+    def __init__(self, path: Optional[str] = None, ttl: float = DEFAULT_TTL,
+                 stale_ttl: float = DEFAULT_STALE_TTL, max_entries: int = DEFAULT_MAX_ENTRIES):
+        """
+        Args:
+            path (str): SQLite file (defaults to data/cache/themealdb.sqlite)
+            ttl (float): Seconds an entry is served without revalidation
+            stale_ttl (float): Extra seconds a stale entry may be served while refreshing
+            max_entries (int): Entries kept before least recently used ones are evicted
+        """
+        self.path = path or cache_path(CACHE_FILE)
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self._store = SQLiteLRU(self.path, "meals", max_entries=max_entries)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+    def get(self, dish_name: str) -> Optional[Tuple[Optional[list], str]]:
+        """
+        Look up a dish. Returns (meals, state) where state is FRESH, STALE or
+        EXPIRED, or None if the dish has never been cached.
+        """
+        row = self._store.get(normalize_key(dish_name))
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return None
+            age = time.time() - row[1]
+            if age <= self.ttl:
+                state = FRESH
+                self.hits += 1
+            elif age <= self.ttl + self.stale_ttl:
+                state = STALE
+                self.stale_hits += 1
+            else:
+                state = EXPIRED
+                self.misses += 1
+        return json.loads(row[0]), state
+
+    def put(self, dish_name: str, meals: Optional[list]):
+        self._store.put(normalize_key(dish_name), json.dumps(meals))
+
+    def clear(self):
+        self._store.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "evictions": self._store.evictions,
+                "entries": len(self._store),
+            }
+
+    def close(self):
+        self._store.close()
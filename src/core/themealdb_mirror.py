@@ -0,0 +1,213 @@
+"""
+Local indexed mirror of TheMealDB.
+
+Meals are bulk-imported from a JSON dump (the {"meals": [...]} format the API
+returns) or refreshed from the live API letter by letter, and stored in
+SQLite with indexes on name, category and ingredient. Meal bodies are kept as
+zlib-compressed JSON with empty fields dropped.
+
+When the mirror file exists, query_themealdb answers from it before going to
+the network.
+"""
+import os
+import json
+import sqlite3
+import string
+import threading
+import time
+import zlib
+from typing import Iterable, List, Optional
+
+from .meal import Meal
+from .utils import DATA_DIR
+
+MIRROR_PATH = os.path.join(DATA_DIR, 'themealdb_mirror.sqlite')
+
+def _name_key(name: str) -> str:
+    return " ".join(name.lower().split())
+
+def _compact(meal: Meal) -> bytes:
+    """Serialize a meal as compressed JSON (empty ingredient fields are already dropped)."""
+    return zlib.compress(json.dumps(meal.to_dict(), separators=(",", ":")).encode("utf-8"))
+
+def _expand(blob: bytes) -> Meal:
+    return Meal.from_dict(json.loads(zlib.decompress(blob).decode("utf-8")))
+
+class MealMirror:
+    def __init__(self, path: str = MIRROR_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(
+            "PRAGMA journal_mode=WAL;"
+            "CREATE TABLE IF NOT EXISTS meals ("
+            " id INTEGER PRIMARY KEY,"
+            " name_key TEXT NOT NULL,"
+            " category TEXT,"
+            " area TEXT,"
+            " body BLOB NOT NULL,"
+            " updated_at REAL NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS meals_name ON meals(name_key);"
+            "CREATE INDEX IF NOT EXISTS meals_category ON meals(category COLLATE NOCASE);"
+            "CREATE TABLE IF NOT EXISTS meal_ingredients ("
+            " meal_id INTEGER NOT NULL,"
+            " ingredient TEXT NOT NULL,"
+            " PRIMARY KEY (ingredient, meal_id)) WITHOUT ROWID;"
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);"
+        )
+        self._conn.commit()
+
+    def import_meals(self, meals: Iterable[dict]) -> int:
+        """Insert or update raw TheMealDB meal dicts. Returns the number of meals written."""
+        now = time.time()
+        count = 0
+        with self._lock:
+            for raw in meals:
+                if not raw or not raw.get("idMeal"):
+                    continue
+                meal = Meal.from_dict(raw)
+                meal_id = int(meal.id)
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO meals (id, name_key, category, area, body, updated_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    (meal_id, _name_key(meal.name), meal.category, meal.area, _compact(meal), now),
+                )
+                self._conn.execute("DELETE FROM meal_ingredients WHERE meal_id = ?", (meal_id,))
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO meal_ingredients (meal_id, ingredient) VALUES (?, ?)",
+                    [(meal_id, _name_key(ingredient)) for ingredient in meal.ingredients],
+                )
+                count += 1
+            self._conn.commit()
+        return count
+
+    def import_dump(self, path: str) -> int:
+        """
+        Import a JSON dump: a file holding {"meals": [...]} or a bare list of
+        meals, or a directory of such files.
+        """
+        if os.path.isdir(path):
+            return sum(self.import_dump(os.path.join(path, f))
+                       for f in sorted(os.listdir(path)) if f.endswith(".json"))
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        meals = data.get("meals") if isinstance(data, dict) else data
+        return self.import_meals(meals or [])
+
+    def _load(self, rows) -> List[Meal]:
+        return [_expand(row[0]) for row in rows]
+
+    def search_by_name(self, name: str, limit: int = 25) -> List[Meal]:
+        """
+        Meals whose name matches, like search.php?s=: exact name first, then
+        names containing the query.
+        """
+        key = _name_key(name)
+        with self._lock:
+            rows = self._conn.execute("SELECT body FROM meals WHERE name_key = ? LIMIT ?", (key, limit)).fetchall()
+            if not rows:
+                pattern = "%" + key.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+                rows = self._conn.execute(
+                    "SELECT body FROM meals WHERE name_key LIKE ? ESCAPE '\\' ORDER BY length(name_key) LIMIT ?",
+                    (pattern, limit),
+                ).fetchall()
+        return self._load(rows)
+
+    def search_by_ingredient(self, ingredient: str, limit: int = 100) -> List[Meal]:
+        """Meals that use the ingredient (matched against strIngredient1..20)."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT m.body FROM meal_ingredients i JOIN meals m ON m.id = i.meal_id"
+                " WHERE i.ingredient = ? LIMIT ?",
+                (_name_key(ingredient), limit),
+            ).fetchall()
+        return self._load(rows)
+
+    def search_by_ingredients(self, ingredients: List[str], limit: int = 100) -> List[Meal]:
+        """Meals that use every one of the ingredients."""
+        keys = sorted({_name_key(i) for i in ingredients if i.strip()})
+        if not keys:
+            return []
+        placeholders = ",".join("?" * len(keys))
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT m.body FROM meals m WHERE m.id IN ("
+                f" SELECT meal_id FROM meal_ingredients WHERE ingredient IN ({placeholders})"
+                " GROUP BY meal_id HAVING COUNT(*) = ?) LIMIT ?",
+                (*keys, len(keys), limit),
+            ).fetchall()
+        return self._load(rows)
+
+    def search_by_category(self, category: str, limit: int = 100) -> List[Meal]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT body FROM meals WHERE category = ? COLLATE NOCASE LIMIT ?", (category, limit)
+            ).fetchall()
+        return self._load(rows)
+
+    def meal_names(self) -> List[str]:
+        """Names of all meals in the mirror."""
+        with self._lock:
+            rows = self._conn.execute("SELECT body FROM meals ORDER BY id").fetchall()
+        return [meal.name for meal in self._load(rows)]
+
+    def get_meta(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value: str):
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+            self._conn.commit()
+
+    def refresh(self, letters: str = string.ascii_lowercase) -> int:
+        """
+        Incrementally refresh from the live API (search.php?f=<letter>), one
+        letter at a time, upserting what comes back. Returns meals written.
+        """
+        from .themealdb_api import get_client, TheMealDBStatusError
+
+        count = 0
+        for letter in letters:
+            response = get_client().get("search.php", params={"f": letter})
+            if response.status_code != 200:
+                raise TheMealDBStatusError(response.status_code)
+            count += self.import_meals(response.json().get("meals") or [])
+        self.set_meta("last_refresh", str(time.time()))
+        return count
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM meals").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+_mirror = None
+_mirror_lock = threading.Lock()
+
+def get_mirror() -> Optional[MealMirror]:
+    """Return the mirror at MIRROR_PATH, or None if it has not been created."""
+    global _mirror
+    with _mirror_lock:
+        if _mirror is None and os.path.exists(MIRROR_PATH):
+            _mirror = MealMirror(MIRROR_PATH)
+        return _mirror
+
+def start_refresh_job(interval: float = 24 * 3600, letters: str = string.ascii_lowercase) -> threading.Thread:
+    """Refresh the mirror from the live API every `interval` seconds on a daemon thread."""
+    def loop():
+        while True:
+            mirror = get_mirror()
+            if mirror is not None:
+                try:
+                    mirror.refresh(letters)
+                except Exception as e:
+                    print(f"[themealdb_mirror] Refresh failed: {e}")
+            time.sleep(interval)
+
+    thread = threading.Thread(target=loop, daemon=True)
+    thread.start()
+    return thread
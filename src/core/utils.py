@@ -0,0 +1,9 @@
+import os
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'data')
+CACHE_DIR = os.path.join(DATA_DIR, 'cache')
+
+def cache_path(filename):
+    """Return the path of a file in the shared data/cache directory, creating the directory if needed."""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    return os.path.join(CACHE_DIR, filename)
@@ -0,0 +1,155 @@
+"""
+Top-k inner-product search over normalized embedding rows.
+
+FlatIndex scores every row. IVFIndex clusters the rows with spherical
+k-means and, per query, scores only the rows of the `n_probe` clusters whose
+centroids are closest, so the work per query grows with the size of a few
+clusters rather than with the whole matrix. Vectors are stored only as
+float16 and converted to float32 a block of rows at a time for scoring.
+
+search_normalized() also returns log(sum(exp(scale * score))) over every row,
+so callers can turn the top-k scores into probabilities of a softmax over the
+whole vocabulary rather than over the k returned rows. It is exact for
+FlatIndex; IVFIndex stands in for each unprobed cluster's rows with its
+centroid's score.
+"""
+from typing import Optional, Tuple
+
+import numpy as np
+
+# Rows converted to float32 at a time when scoring a FlatIndex
+SCORE_BLOCK_ROWS = 8192
+
+def _logsumexp(values: np.ndarray, axis: int = -1) -> np.ndarray:
+    peak = values.max(axis=axis, keepdims=True)
+    return (peak + np.log(np.exp(values - peak).sum(axis=axis, keepdims=True))).squeeze(axis)
+
+def _top_k(scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """(scores, column ids) of the k best columns per row, best first."""
+    k = min(k, scores.shape[1])
+    ids = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    top = np.take_along_axis(scores, ids, axis=1)
+    order = np.argsort(-top, axis=1)
+    return np.take_along_axis(top, order, axis=1), np.take_along_axis(ids, order, axis=1)
+
+class FlatIndex:
+    kind = "flat"
+
+    def __init__(self, vectors: np.ndarray):
+        self.vectors = vectors.astype(np.float16)
+
+    def __len__(self):
+        return self.vectors.shape[0]
+
+    def _scores(self, queries: np.ndarray) -> np.ndarray:
+        queries = np.atleast_2d(queries).astype(np.float32)
+        scores = np.empty((len(queries), len(self.vectors)), dtype=np.float32)
+        for start in range(0, len(self.vectors), SCORE_BLOCK_ROWS):
+            block = self.vectors[start:start + SCORE_BLOCK_ROWS].astype(np.float32)
+            scores[:, start:start + len(block)] = queries @ block.T
+        return scores
+
+    def search(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(scores, ids), each of shape (len(queries), k)."""
+        return _top_k(self._scores(queries), k)
+
+    def search_normalized(self, queries: np.ndarray, k: int, scale: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(scores, ids, log_partition); see the module docstring."""
+        scores = self._scores(queries)
+        return (*_top_k(scores, k), _logsumexp(scale * scores))
+
+    def to_arrays(self) -> dict:
+        return {"vectors": self.vectors}
+
+    @classmethod
+    def from_arrays(cls, arrays) -> "FlatIndex":
+        return cls(arrays["vectors"])
+
+class IVFIndex:
+    kind = "ivf"
+
+    def __init__(self, vectors: np.ndarray, centroids: np.ndarray, offsets: np.ndarray, ids: np.ndarray,
+                 n_probe: int = 8):
+        """
+        Args:
+            vectors (np.ndarray): Rows grouped by cluster (cluster c is rows offsets[c]:offsets[c+1])
+            centroids (np.ndarray): One normalized centroid per cluster
+            offsets (np.ndarray): Cluster boundaries into vectors, length n_lists + 1
+            ids (np.ndarray): Original row id of each grouped row
+            n_probe (int): Clusters scored per query
+        """
+        self.vectors = vectors.astype(np.float16)
+        self.centroids = centroids.astype(np.float32)
+        self.offsets = offsets
+        self.ids = ids
+        self.n_probe = n_probe
+
+    def __len__(self):
+        return self.vectors.shape[0]
+
+    @classmethod
+    def build(cls, vectors: np.ndarray, n_lists: int = None, n_probe: int = 8, iterations: int = 10,
+              sample_size: int = 20000, seed: int = 0) -> "IVFIndex":
+        """Cluster the rows with spherical k-means (trained on a sample) and group them by cluster."""
+        vectors = vectors.astype(np.float32)
+        count = vectors.shape[0]
+        n_lists = n_lists or max(1, int(4 * np.sqrt(count)))
+        n_lists = min(n_lists, count)
+        rng = np.random.default_rng(seed)
+        sample = vectors[rng.choice(count, min(sample_size, count), replace=False)]
+        centroids = sample[rng.choice(len(sample), n_lists, replace=False)]
+        for _ in range(iterations):
+            assign = (sample @ centroids.T).argmax(axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, sample)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            # Empty clusters keep their old centroid
+            centroids = np.where(norms > 0, sums / np.maximum(norms, 1e-12), centroids)
+
+        assign = np.concatenate([(vectors[i:i + 8192] @ centroids.T).argmax(axis=1)
+                                 for i in range(0, count, 8192)])
+        ids = np.argsort(assign, kind="stable")
+        offsets = np.searchsorted(assign[ids], np.arange(n_lists + 1))
+        return cls(vectors[ids], centroids, offsets, ids, n_probe=n_probe)
+
+    def search(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(scores, ids), each of shape (len(queries), k); missing slots have score -inf and id -1."""
+        return self.search_normalized(queries, k, None)[:2]
+
+    def search_normalized(self, queries: np.ndarray, k: int, scale: Optional[float]
+                          ) -> Tuple[np.ndarray, np.ndarray, Optional[np.ndarray]]:
+        """(scores, ids, log_partition); see the module docstring. log_partition is None without a scale."""
+        queries = np.atleast_2d(queries).astype(np.float32)
+        n_probe = min(self.n_probe, len(self.centroids))
+        centroid_scores = queries @ self.centroids.T
+        probes = np.argpartition(-centroid_scores, n_probe - 1, axis=1)[:, :n_probe]
+        sizes = np.diff(self.offsets)
+        all_scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        all_ids = np.full((len(queries), k), -1, dtype=np.int64)
+        log_partition = np.empty(len(queries), dtype=np.float32) if scale is not None else None
+        for q, query in enumerate(queries):
+            rows = np.concatenate([np.arange(self.offsets[c], self.offsets[c + 1]) for c in probes[q]])
+            row_scores = self.vectors[rows].astype(np.float32) @ query
+            if len(rows):
+                scores, local = _top_k(row_scores[None, :], k)
+                all_scores[q, :scores.shape[1]] = scores[0]
+                all_ids[q, :scores.shape[1]] = self.ids[rows[local[0]]]
+            if scale is not None:
+                unprobed = np.ones(len(sizes), dtype=bool)
+                unprobed[probes[q]] = False
+                unprobed &= sizes > 0
+                terms = np.concatenate([scale * row_scores,
+                                        scale * centroid_scores[q, unprobed] + np.log(sizes[unprobed])])
+                log_partition[q] = _logsumexp(terms) if len(terms) else -np.inf
+        return all_scores, all_ids, log_partition
+
+    def to_arrays(self) -> dict:
+        return {"vectors": self.vectors, "centroids": self.centroids, "offsets": self.offsets,
+                "ids": self.ids, "n_probe": np.array(self.n_probe)}
+
+    @classmethod
+    def from_arrays(cls, arrays) -> "IVFIndex":
+        return cls(arrays["vectors"], arrays["centroids"], arrays["offsets"], arrays["ids"],
+                   n_probe=int(arrays["n_probe"]))
+
+INDEX_TYPES = {FlatIndex.kind: FlatIndex, IVFIndex.kind: IVFIndex}
@@ -1,66 +1,285 @@
-from typing import Optional
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Iterator, List, Optional, Tuple
+import numpy as np
 from PIL import Image
 
-SINGAPORE_DISHES = [
-    "Hainanese chicken rice",
-    "Laksa",
-    "Char kway teow",
-    "Chilli crab",
-    "Satay",
-    "Roti prata",
-    "Bak kut teh",
-    "Nasi lemak",
-    "Kaya toast",
-    "Fish head curry",
-    "Mee siam",
-    "Chicken rice",
-    "Wanton mee",
-    "Hokkien mee",
-    "Popiah",
-    "Ice kacang",
-    "Chendol",
-    "Tau huay",
-    "Carrot cake",
-    "Otah"
-]
+from .dish_catalog import DISH_INDEX_PATH, SINGAPORE_DISHES, load_dish_index
+from .image_cache import get_image_cache, image_digest
+from .label_bank import LabelBank, encode_images, encode_pixels, labels_hash, model_revision, preprocess_images
+from .model_registry import get_registry
 
-def infer_dish_from_image(image_path: str) -> Optional[str]:
-    try:
-        from transformers import CLIPProcessor, CLIPModel
+CLIP_MODEL_NAME = "openai/clip-vit-base-patch32"
+BLIP_MODEL_NAME = "Salesforce/blip-image-captioning-base"
 
-        model = CLIPModel.from_pretrained("openai/clip-vit-base-patch32")
-        processor = CLIPProcessor.from_pretrained("openai/clip-vit-base-patch32")
+# Below this CLIP confidence the image is captioned with BLIP instead
+CONFIDENCE_THRESHOLD = 0.3
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp", ".bmp")
 
-        image = Image.open(image_path).convert("RGB")
+def _load_clip():
+    from transformers import CLIPProcessor, CLIPModel
+    return CLIPModel.from_pretrained(CLIP_MODEL_NAME).eval(), CLIPProcessor.from_pretrained(CLIP_MODEL_NAME)
 
-        inputs = processor(text=SINGAPORE_DISHES, images=image, return_tensors="pt", padding=True)
-        outputs = model(**inputs)
-        logits_per_image = outputs.logits_per_image
-        probs = logits_per_image.softmax(dim=1)
+def _load_blip():
+    from transformers import BlipProcessor, BlipForConditionalGeneration
+    return BlipForConditionalGeneration.from_pretrained(BLIP_MODEL_NAME).eval(), BlipProcessor.from_pretrained(BLIP_MODEL_NAME)
 
-        best_idx = probs.argmax()
-        confidence = probs[0, best_idx].item()
+def get_clip():
+    """(model, processor) for CLIP, loaded once per process through the model registry (not pinned)."""
+    return get_registry().get("clip", CLIP_MODEL_NAME, _load_clip)
 
-        if confidence > 0.3:
-            return SINGAPORE_DISHES[best_idx]
-    except Exception as e:
-        print(f"CLIP error: {e}")
+def get_blip():
+    """(model, processor) for BLIP captioning, loaded once per process through the model registry (not pinned)."""
+    return get_registry().get("blip", BLIP_MODEL_NAME, _load_blip)
 
-    try:
-        from transformers import BlipProcessor, BlipForConditionalGeneration
+def use_clip():
+    """Context manager pinning CLIP (model, processor), so it cannot be evicted during an inference."""
+    return get_registry().use("clip", CLIP_MODEL_NAME, _load_clip)
+
+def use_blip():
+    """Context manager pinning BLIP (model, processor), so it cannot be evicted during an inference."""
+    return get_registry().use("blip", BLIP_MODEL_NAME, _load_blip)
+
+def _label_bank_spec(labels: List[str] = SINGAPORE_DISHES):
+    def load():
+        with use_clip() as (model, processor):
+            return LabelBank.build(model, processor, labels, CLIP_MODEL_NAME)
+    return "clip_labels", CLIP_MODEL_NAME, load, {"labels": labels_hash(labels)}
+
+def get_label_bank(labels: List[str] = SINGAPORE_DISHES) -> LabelBank:
+    """CLIP text embeddings of the labels, computed once (and kept in data/cache across runs)."""
+    return get_registry().get(*_label_bank_spec(labels))
+
+# mtime of a dish index found not to match the loaded CLIP, so it is skipped without re-warning
+_mismatched_index_mtime = None
+
+def _dish_classifier_spec():
+    """
+    Registry spec of the large dish index from src/scripts/build_dish_index.py
+    if it exists and was built with the loaded CLIP, otherwise of the
+    SINGAPORE_DISHES label bank.
+    """
+    global _mismatched_index_mtime
+    if os.path.exists(DISH_INDEX_PATH):
+        mtime_ns = os.stat(DISH_INDEX_PATH).st_mtime_ns
+        if mtime_ns != _mismatched_index_mtime:
+            spec = ("dish_index", DISH_INDEX_PATH, load_dish_index, {"mtime_ns": mtime_ns})
+            index = get_registry().get(*spec)
+            with use_clip() as (model, _):
+                revision = model_revision(model)
+            if index is not None and index.model_name == CLIP_MODEL_NAME and index.revision == revision:
+                return spec
+            # Warn once per index file; it is checked again only after a rebuild
+            _mismatched_index_mtime = mtime_ns
+            get_registry().evict("dish_index")
+            print(f"[vlm] {DISH_INDEX_PATH} was built for another CLIP model; rebuild it with build_dish_index.py")
+    return _label_bank_spec()
+
+def get_dish_classifier():
+    """The dish index or label bank (see _dish_classifier_spec), not pinned."""
+    return get_registry().get(*_dish_classifier_spec())
 
-        processor = BlipProcessor.from_pretrained("Salesforce/blip-image-captioning-base")
-        model = BlipForConditionalGeneration.from_pretrained("Salesforce/blip-image-captioning-base")
+def use_dish_classifier():
+    """Context manager pinning the dish index or label bank for an inference."""
+    return get_registry().use(*_dish_classifier_spec())
 
-        image = Image.open(image_path).convert("RGB")
+def load_image(image_path: str):
+    """(RGB image, content digest) for an image file; the digest keys the image cache."""
+    image = Image.open(image_path).convert("RGB")
+    return image, image_digest(image)
 
-        inputs = processor(image, return_tensors="pt")
-        outputs = model.generate(**inputs)
-        caption = processor.decode(outputs[0], skip_special_tokens=True)
+def image_embedding(image, digest: str) -> np.ndarray:
+    """CLIP image embedding, shape (1, dim), from the image cache when this picture was seen before."""
+    with use_clip() as (model, processor):
+        model_id = f"{CLIP_MODEL_NAME}@{model_revision(model)}"
+        cache = get_image_cache()
+        embedding = cache.get(digest, model_id, "embedding") if cache else None
+        if embedding is None:
+            embedding = encode_images(model, processor, [image])
+            if cache:
+                cache.put(digest, model_id, embedding=embedding)
+        return embedding
 
-        if len(caption.split()) > 10:
-            caption = " ".join(caption.split()[:6]).rstrip(",")
+def classify_image(image, digest: str) -> Tuple[str, float]:
+    """(dish, confidence) from the dish classifier, cached per image, CLIP revision and label set."""
+    with use_clip() as (model, _), use_dish_classifier() as classifier:
+        model_id = f"{CLIP_MODEL_NAME}@{model_revision(model)}/{classifier.fingerprint}"
+        cache = get_image_cache()
+        result = cache.get(digest, model_id, "label") if cache else None
+        if result is None:
+            result = classifier.best(image_embedding(image, digest))
+            if cache:
+                cache.put(digest, model_id, label=result)
+        return result
+
+def caption_image(image, digest: str) -> str:
+    """BLIP caption, cached per image and BLIP revision."""
+    with use_blip() as (model, processor):
+        model_id = f"{BLIP_MODEL_NAME}@{model_revision(model)}"
+        cache = get_image_cache()
+        caption = cache.get(digest, model_id, "caption") if cache else None
+        if caption is None:
+            inputs = processor(image, return_tensors="pt")
+            outputs = model.generate(**inputs)
+            caption = processor.decode(outputs[0], skip_special_tokens=True)
+            if cache:
+                cache.put(digest, model_id, caption=caption)
         return caption
+
+def _short_caption(caption: str) -> str:
+    if len(caption.split()) > 10:
+        caption = " ".join(caption.split()[:6]).rstrip(",")
+    return caption
+
+def infer_dish_from_image(image_path: str) -> Optional[str]:
+    image = digest = None
+    try:
+        image, digest = load_image(image_path)
+
+        # Only the image goes through CLIP (and only once per picture); the dish names are already embedded
+        dish, confidence = classify_image(image, digest)
+
+        if confidence > CONFIDENCE_THRESHOLD:
+            return dish
+    except Exception as e:
+        print(f"CLIP error: {e}")
+
+    try:
+        if image is None:
+            image, digest = load_image(image_path)
+
+        return _short_caption(caption_image(image, digest))
     except Exception as e:
         print(f"[vlm.infer_dish_from_image] Error running BLIP: {e}")
-        return None
\ No newline at end of file
+        return None
+
+def list_images(paths: Iterable[str]) -> List[str]:
+    """Image files among `paths`, with directories expanded recursively (sorted)."""
+    images = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                images.extend(os.path.join(root, f) for f in sorted(files) if f.lower().endswith(IMAGE_EXTENSIONS))
+        else:
+            images.append(path)
+    return images
+
+def _prepare(image_path: str, processor) -> dict:
+    """Decode, hash and CLIP-preprocess one image (runs on the decode pool)."""
+    item = {"path": image_path}
+    try:
+        item["image"], item["digest"] = load_image(image_path)
+        item["pixels"] = preprocess_images(processor, [item["image"]])[0]
+    except Exception as e:
+        item["error"] = str(e)
+    return item
+
+def _classify_batch(items: List[dict], cache):
+    """Fill dish/confidence for decoded items, running the CLIP image tower once for the uncached ones."""
+    with use_clip() as (model, _), use_dish_classifier() as classifier:
+        clip_id = f"{CLIP_MODEL_NAME}@{model_revision(model)}"
+        label_id = f"{clip_id}/{classifier.fingerprint}"
+
+        pending = []
+        for item in items:
+            result = cache.get(item["digest"], label_id, "label") if cache else None
+            if result is not None:
+                item["dish"], item["confidence"] = result
+            else:
+                pending.append(item)
+        if not pending:
+            return
+
+        embeddings = [cache.get(item["digest"], clip_id, "embedding") if cache else None for item in pending]
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if missing:
+            encoded = encode_pixels(model, np.stack([pending[i]["pixels"] for i in missing]))
+            for row, i in enumerate(missing):
+                embeddings[i] = encoded[row:row + 1]
+                if cache:
+                    cache.put(pending[i]["digest"], clip_id, embedding=embeddings[i])
+
+        for item, ranked in zip(pending, classifier.top_k(np.concatenate(embeddings))):
+            item["dish"], item["confidence"] = ranked[0]
+            if cache:
+                cache.put(item["digest"], label_id, label=ranked[0])
+
+def _caption_batch(items: List[dict], cache, pool: ThreadPoolExecutor):
+    """Fill caption for decoded items with one batched BLIP generate over the uncached ones."""
+    import torch
+
+    with use_blip() as (model, processor):
+        model_id = f"{BLIP_MODEL_NAME}@{model_revision(model)}"
+
+        pending = []
+        for item in items:
+            caption = cache.get(item["digest"], model_id, "caption") if cache else None
+            if caption is not None:
+                item["caption"] = caption
+            else:
+                pending.append(item)
+        if not pending:
+            return
+
+        pixels = list(pool.map(lambda item: processor(item["image"], return_tensors="np")["pixel_values"][0], pending))
+        with torch.no_grad():
+            outputs = model.generate(pixel_values=torch.from_numpy(np.stack(pixels)))
+        for item, caption in zip(pending, processor.batch_decode(outputs, skip_special_tokens=True)):
+            item["caption"] = caption
+            if cache:
+                cache.put(item["digest"], model_id, caption=caption)
+
+def _result(item: dict) -> dict:
+    result = {"path": item["path"], "dish": None, "confidence": item.get("confidence"), "source": None}
+    if "caption" in item:
+        result["dish"], result["source"] = _short_caption(item["caption"]), "blip"
+    elif item.get("confidence") is not None and item["confidence"] > CONFIDENCE_THRESHOLD:
+        result["dish"], result["source"] = item["dish"], "clip"
+    if "error" in item:
+        result["error"] = item["error"]
+    return result
+
+def infer_dishes_from_images(image_paths: Iterable[str], batch_size: int = 16, workers: Optional[int] = None,
+                             caption_uncertain: bool = True) -> Iterator[dict]:
+    """
+    Batch counterpart of infer_dish_from_image. Images are decoded and
+    preprocessed on a thread pool (the next batch while the current one runs
+    through CLIP), classified batch_size at a time, and only the ones at or
+    below CONFIDENCE_THRESHOLD are captioned with BLIP, also batched (unless
+    caption_uncertain is False).
+
+    Yields one dict per path, in input order: path, dish, confidence (CLIP),
+    source ("clip", "blip" or None) and error if the image or a model failed.
+    """
+    cache = get_image_cache()
+    paths = list(image_paths)
+    batches = [paths[i:i + batch_size] for i in range(0, len(paths), batch_size)]
+
+    # CLIP stays pinned for the whole run; the pool preprocesses with its processor
+    with use_clip() as (_, processor), \
+            ThreadPoolExecutor(max_workers=workers or min(32, (os.cpu_count() or 1) + 4)) as pool:
+        def submit(batch):
+            return [pool.submit(_prepare, path, processor) for path in batch]
+
+        upcoming = submit(batches[0]) if batches else []
+        for index in range(len(batches)):
+            items = [future.result() for future in upcoming]
+            upcoming = submit(batches[index + 1]) if index + 1 < len(batches) else []
+
+            decoded = [item for item in items if "error" not in item]
+            try:
+                if decoded:
+                    _classify_batch(decoded, cache)
+            except Exception as e:
+                print(f"CLIP error: {e}")
+            uncertain = [item for item in decoded if not item.get("confidence", 0) > CONFIDENCE_THRESHOLD]
+            if caption_uncertain and uncertain:
+                try:
+                    _caption_batch(uncertain, cache, pool)
+                except Exception as e:
+                    print(f"[vlm.infer_dishes_from_images] Error running BLIP: {e}")
+                    for item in uncertain:
+                        item["error"] = str(e)
+            for item in items:
+                yield _result(item)
@@ -0,0 +1,50 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import argparse
+import time
+
+import numpy as np
+
+from src.core.vector_index import FlatIndex, IVFIndex
+
+def make_embeddings(count, dim, rng, clusters=500):
+    """Clustered unit vectors, roughly like text embeddings of related dish names."""
+    centers = rng.standard_normal((clusters, dim))
+    vectors = centers[rng.integers(0, clusters, count)] + 0.5 * rng.standard_normal((count, dim))
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark flat vs IVF top-k search over synthetic dish embeddings")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--dim", type=int, default=512, help="Embedding size (512 for CLIP ViT-B/32)")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=20)
+    parser.add_argument("--n-probe", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    for size in args.sizes:
+        vectors = make_embeddings(size, args.dim, rng)
+        queries = vectors[rng.choice(size, args.queries)] + 0.1 * rng.standard_normal((args.queries, args.dim))
+        queries = (queries / np.linalg.norm(queries, axis=1, keepdims=True)).astype(np.float32)
+
+        start = time.perf_counter()
+        ivf = IVFIndex.build(vectors, n_probe=args.n_probe)
+        build_time = time.perf_counter() - start
+        flat = FlatIndex(vectors)
+
+        results = {}
+        for index in (flat, ivf):
+            start = time.perf_counter()
+            results[index.kind] = [index.search(q, args.k)[1][0] for q in queries]
+            elapsed = (time.perf_counter() - start) / args.queries
+            print(f"{size:>7} labels  {index.kind:>4}: {elapsed * 1000:6.2f} ms/image, "
+                  f"{index.vectors.nbytes / 2**20:6.1f} MiB float16")
+        recall = np.mean([len(set(f) & set(i)) / len(f) for f, i in zip(results["flat"], results["ivf"])])
+        print(f"{'':>14} IVF build {build_time:.1f}s, recall@{args.k} vs flat {recall:.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import argparse
+import random
+import string
+import time
+
+from src.core.fuzzy import FuzzyVocabulary
+
+SYLLABLES = ["ba", "ku", "teh", "char", "kway", "mee", "nasi", "le", "mak", "sa", "tay",
+             "ro", "ti", "pra", "ta", "lak", "sa", "chi", "li", "crab", "ka", "ya", "po", "piah"]
+
+def make_dish_names(n, seed):
+    """Generate n synthetic dish names of 2-4 words each."""
+    rng = random.Random(seed)
+    names = set()
+    while len(names) < n:
+        words = ["".join(rng.choice(SYLLABLES) for _ in range(rng.randint(1, 3)))
+                 for _ in range(rng.randint(2, 4))]
+        names.add(" ".join(words))
+    return list(names)
+
+def make_typo(word, rng):
+    """Apply one random insert, delete, substitute or transpose."""
+    i = rng.randrange(len(word))
+    op = rng.choice("idst")
+    if op == "i":
+        return word[:i] + rng.choice(string.ascii_lowercase) + word[i:]
+    if op == "d" and len(word) > 1:
+        return word[:i] + word[i + 1:]
+    if op == "t" and i < len(word) - 1:
+        return word[:i] + word[i + 1] + word[i] + word[i + 2:]
+    return word[:i] + rng.choice(string.ascii_lowercase) + word[i + 1:]
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark fuzzy dish-word lookups")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000],
+                        help="Number of dish names to index")
+    parser.add_argument("--queries", type=int, default=2000, help="Number of lookups per size")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    for size in args.sizes:
+        names = make_dish_names(size, args.seed)
+        words = {w for name in names for w in name.split()}
+
+        start = time.perf_counter()
+        vocabulary = FuzzyVocabulary(words)
+        build_s = time.perf_counter() - start
+
+        sample = rng.sample(sorted(words), min(args.queries, len(words)))
+        queries = [make_typo(w, rng) for w in sample]
+        latencies = []
+        found = 0
+        for q in queries:
+            start = time.perf_counter()
+            result = vocabulary.lookup(q, max_distance=1)
+            latencies.append((time.perf_counter() - start) * 1000)
+            found += result is not None
+
+        print(f"names={size:>7} words={len(words):>7} build={build_s:6.2f}s "
+              f"p50={percentile(latencies, 50):.3f}ms p99={percentile(latencies, 99):.3f}ms "
+              f"max={max(latencies):.3f}ms matched={found / len(queries):.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import argparse
+import time
+
+from src.core.image_cache import configure_image_cache
+from src.core.utils import DATA_DIR
+from src.core.vlm import get_blip, get_clip, infer_dish_from_image, infer_dishes_from_images, list_images
+
+IMAGES_DIR = os.path.join(DATA_DIR, 'images')
+
+def main():
+    parser = argparse.ArgumentParser(description="Images/sec of batch dish classification versus batch size")
+    parser.add_argument("--images", type=str, default=IMAGES_DIR)
+    parser.add_argument("--count", type=int, default=64, help="Images per run (the directory is repeated)")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--no-blip", action="store_true")
+    args = parser.parse_args()
+
+    # Every run must do the full work, so nothing may come from the cache
+    configure_image_cache(enabled=False)
+    paths = list_images([args.images])
+    paths = (paths * (args.count // max(len(paths), 1) + 1))[:args.count]
+    get_clip()
+    if not args.no_blip:
+        get_blip()
+
+    start = time.perf_counter()
+    for path in paths:
+        infer_dish_from_image(path)
+    elapsed = time.perf_counter() - start
+    print(f"infer_dish_from_image loop: {len(paths) / elapsed:6.1f} images/s")
+
+    for batch_size in args.batch_sizes:
+        start = time.perf_counter()
+        results = list(infer_dishes_from_images(paths, batch_size=batch_size, workers=args.workers,
+                                                caption_uncertain=not args.no_blip))
+        elapsed = time.perf_counter() - start
+        captioned = sum(1 for r in results if r["source"] == "blip")
+        print(f"batch_size={batch_size:>3}: {len(paths) / elapsed:6.1f} images/s ({captioned} sent to BLIP)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import argparse
+import time
+
+from src.core.image_cache import configure_image_cache, image_cache_stats
+from src.core.utils import DATA_DIR
+
+IMAGES_DIR = os.path.join(DATA_DIR, 'images')
+
+def main():
+    parser = argparse.ArgumentParser(description="Latency of repeated image recognition with and without the image cache")
+    parser.add_argument("--images", type=str, default=IMAGES_DIR, help="Directory of images to send")
+    parser.add_argument("--rounds", type=int, default=3, help="Times every image is sent")
+    parser.add_argument("--mode", choices=["vlm", "mllm"], default="vlm")
+    parser.add_argument("--prompt", type=str, default=None, help="User prompt for --mode mllm")
+    parser.add_argument("--persist", action="store_true", help="Use the on-disk tier (data/cache/image_results.sqlite)")
+    parser.add_argument("--no-cache", action="store_true")
+    args = parser.parse_args()
+
+    if args.mode == "mllm":
+        from src.core.mllm import infer_dish_from_image
+        infer = lambda path: infer_dish_from_image(path, prompt=args.prompt)
+    else:
+        from src.core.vlm import infer_dish_from_image
+        infer = infer_dish_from_image
+
+    configure_image_cache(enabled=not args.no_cache, persist=args.persist)
+    paths = [os.path.join(args.images, f) for f in sorted(os.listdir(args.images))
+             if f.lower().endswith((".jpg", ".jpeg", ".png", ".webp"))]
+
+    for round_no in range(1, args.rounds + 1):
+        start = time.perf_counter()
+        results = [infer(path) for path in paths]
+        elapsed = time.perf_counter() - start
+        print(f"Round {round_no}: {len(paths)} images in {elapsed:.2f}s "
+              f"({elapsed / max(len(paths), 1) * 1000:.0f} ms/image)")
+        if round_no == 1:
+            for path, result in zip(paths, results):
+                print(f"  {os.path.basename(path)}: {result}")
+
+    stats = image_cache_stats()
+    for field in ("embedding", "label", "caption"):
+        if field in stats:
+            print(f"{field:>9}: {stats[field]}")
+
+if __name__ == "__main__":
+    main()
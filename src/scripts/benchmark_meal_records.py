@@ -0,0 +1,80 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+
+from src.core.meal import Meal
+from src.scripts.mock_themealdb import make_meal
+
+def raw_meals(count):
+    """Full-width TheMealDB dicts (all 20 ingredient/measure pairs present, mostly blank)."""
+    meals = [make_meal(f"dish {i}", 50000 + i) for i in range(count)]
+    # Round-trip through JSON so every string is a distinct object, as from the API
+    return json.loads(json.dumps(meals))
+
+def measure_memory(build):
+    gc.collect()
+    tracemalloc.start()
+    objects = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return objects, current
+
+def format_dict(meal):
+    """The dict-probing formatter Meal.format replaces."""
+    name = meal.get("strMeal", "Unknown")
+    instructions = (meal.get("strInstructions") or "").replace("\n", " ").strip()
+    ingredients = []
+    for i in range(1, 21):
+        ingredient = meal.get(f"strIngredient{i}")
+        measure = meal.get(f"strMeasure{i}")
+        if ingredient and ingredient.strip():
+            ingredients.append(f"{measure} {ingredient}".strip())
+    return (
+        f"Recipe for {name}:\n\n"
+        f"Ingredients:\n" + "\n".join(f"- {ing}" for ing in ingredients) + "\n\n"
+        f"Instructions:\n{instructions}"
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare raw TheMealDB dicts with Meal records")
+    parser.add_argument("--meals", type=int, default=100000, help="Number of synthetic meals")
+    parser.add_argument("--formats", type=int, default=5, help="Times each meal is formatted")
+    args = parser.parse_args()
+
+    payload = json.dumps({"meals": raw_meals(args.meals)})
+
+    dicts, dict_bytes = measure_memory(lambda: json.loads(payload)["meals"])
+    meals, meal_bytes = measure_memory(lambda: [Meal.from_dict(m) for m in json.loads(payload)["meals"]])
+    print(f"Memory for {args.meals} meals:")
+    print(f"  raw dicts:    {dict_bytes / 2**20:8.1f} MiB ({dict_bytes / args.meals:.0f} B/meal)")
+    print(f"  Meal records: {meal_bytes / 2**20:8.1f} MiB ({meal_bytes / args.meals:.0f} B/meal)")
+
+    start = time.perf_counter()
+    for _ in range(args.formats):
+        for meal in dicts:
+            format_dict(meal)
+    dict_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    parsed = [Meal.from_dict(m) for m in dicts]
+    parse_time = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(args.formats):
+        for meal in parsed:
+            meal.format()
+    meal_time = time.perf_counter() - start
+
+    mismatches = sum(format_dict(d) != m.format() for d, m in zip(dicts, parsed))
+    print(f"Formatting each meal {args.formats}x:")
+    print(f"  raw dicts:    {dict_time:.2f}s")
+    print(f"  Meal records: {meal_time:.2f}s (+{parse_time:.2f}s one-off parse)")
+    print(f"  output mismatches: {mismatches}")
+
+if __name__ == "__main__":
+    main()
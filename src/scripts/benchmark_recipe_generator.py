@@ -0,0 +1,138 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.core.batching import MicroBatcher
+from src.core.custom_llm import RecipeGenerator, BACKENDS, BATCH_MAX_WAIT_MS
+from src.core.generation_cache import canonical_ingredients, generation_cache_stats
+from src.core.utils import DATA_DIR
+
+INGREDIENTS_DIR = os.path.join(DATA_DIR, 'ingredients')
+
+def load_prompts(directory=INGREDIENTS_DIR):
+    """Prompt texts from the data/ingredients files, as the custom model mode receives them."""
+    prompts = []
+    for filename in sorted(os.listdir(directory)):
+        if filename.endswith(".txt"):
+            with open(os.path.join(directory, filename), 'r', encoding='utf-8') as f:
+                prompts.append(f.read())
+    return prompts
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+def time_prompts(generator, prompts, repeat):
+    """Latency (s) of every generate_recipe call after one untimed warm-up pass."""
+    for prompt in prompts:
+        generator.generate_recipe(prompt)
+    latencies = []
+    for _ in range(repeat):
+        for prompt in prompts:
+            start = time.perf_counter()
+            generator.generate_recipe(prompt)
+            latencies.append(time.perf_counter() - start)
+    return latencies
+
+def time_batches(generator, prompts, batch_size, total):
+    """Prompts/sec when `total` prompts are generated `batch_size` at a time."""
+    work = [prompts[i % len(prompts)] for i in range(total)]
+    generator.generate_recipes(work[:batch_size])  # warm-up for this batch shape
+    start = time.perf_counter()
+    for i in range(0, total, batch_size):
+        generator.generate_recipes(work[i:i + batch_size])
+    return total / (time.perf_counter() - start)
+
+def time_micro_batcher(generator, prompts, clients, total, max_batch, max_wait_ms):
+    """Prompts/sec with `clients` threads calling through a MicroBatcher."""
+    batcher = MicroBatcher(generator.generate_recipes, max_batch=max_batch, max_wait_ms=max_wait_ms)
+    work = [prompts[i % len(prompts)] for i in range(total)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        list(pool.map(batcher, work))
+    elapsed = time.perf_counter() - start
+    batcher.close()
+    return total / elapsed, batcher.stats()
+
+def time_streaming(generator, prompts):
+    """(time to first line, total time) in seconds for each stream_recipe call."""
+    timings = []
+    for prompt in prompts:
+        start = time.perf_counter()
+        first = None
+        for _ in generator.stream_recipe(prompt):
+            if first is None:
+                first = time.perf_counter() - start
+        timings.append((first, time.perf_counter() - start))
+    return timings
+
+def reorder_prompt(generator, prompt):
+    """The same prompt with its ingredients reversed and upper-cased."""
+    ingredients = [item.upper() for item in reversed(generator._ingredient_list(prompt))]
+    return f"ingredients: {ingredients!r}"
+
+def time_cache(generator, prompts):
+    """(cold, reordered) latency in seconds per prompt with the generation cache on."""
+    generator.use_cache = True
+    timings = []
+    for prompt in prompts:
+        start = time.perf_counter()
+        generator.generate_recipe(prompt)
+        cold = time.perf_counter() - start
+        start = time.perf_counter()
+        generator.generate_recipe(reorder_prompt(generator, prompt))
+        timings.append((cold, time.perf_counter() - start))
+    generator.use_cache = False
+    return timings
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark T5 recipe generation latency and batching on data/ingredients prompts")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed passes over the prompts")
+    parser.add_argument("--backend", choices=BACKENDS, default=None, help="Model backend (default: DEFAULT_BACKEND)")
+    parser.add_argument("--quantize", action="store_true", help="int8 model (onnx backend)")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--total", type=int, default=16, help="Prompts generated per batch-size run")
+    parser.add_argument("--clients", type=int, default=8, help="Concurrent callers for the micro-batcher run")
+    args = parser.parse_args()
+
+    prompts = load_prompts()
+    # Timings must not be answered from the generation cache
+    generator = RecipeGenerator(backend=args.backend, quantize=args.quantize, use_cache=False)
+    print(f"Backend: {generator.backend}{' int8' if args.quantize else ''}, {len(prompts)} prompts")
+
+    for prompt in prompts:
+        input_text = generator._input_text(canonical_ingredients(generator._ingredient_list(prompt)))
+        input_ids, _ = generator._encode([input_text])
+        print(f"  {len(generator.tokenizer(input_text).input_ids):4d} tokens -> padded to {input_ids.shape[1]}")
+
+    for dynamic in (False, True):
+        generator.dynamic_padding = dynamic
+        latencies = time_prompts(generator, prompts, args.repeat)
+        label = "bucketed padding" if dynamic else "pad to 512"
+        print(f"{label:>16}: mean {sum(latencies) / len(latencies) * 1000:.0f} ms, "
+              f"p50 {percentile(latencies, 50) * 1000:.0f} ms, p95 {percentile(latencies, 95) * 1000:.0f} ms")
+
+    print("Streaming (time to first line / total):")
+    for first, total in time_streaming(generator, prompts):
+        print(f"  {first * 1000:6.0f} ms / {total * 1000:6.0f} ms")
+
+    print("Batched generate_recipes throughput:")
+    for batch_size in args.batch_sizes:
+        print(f"  batch {batch_size:3d}: {time_batches(generator, prompts, batch_size, args.total):.2f} prompts/s")
+
+    throughput, stats = time_micro_batcher(generator, prompts, args.clients, args.total,
+                                           max(args.batch_sizes), BATCH_MAX_WAIT_MS)
+    print(f"MicroBatcher with {args.clients} clients: {throughput:.2f} prompts/s, "
+          f"mean batch size {stats['mean_batch_size']:.1f}")
+
+    print("Generation cache (cold / same ingredients reordered and re-cased):")
+    for cold, reordered in time_cache(generator, prompts):
+        print(f"  {cold * 1000:6.0f} ms / {reordered * 1000:6.2f} ms")
+    print(f"  {generation_cache_stats()}")
+
+if __name__ == "__main__":
+    main()
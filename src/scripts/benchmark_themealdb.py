@@ -0,0 +1,52 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import argparse
+import asyncio
+import time
+
+from src.core import themealdb_api
+from src.core.themealdb_async import AsyncTheMealDBClient, query_many
+from src.scripts.mock_themealdb import start_server
+
+async def run_bulk(prompts, concurrency, base_url):
+    async with AsyncTheMealDBClient(base_url=base_url, pool_size=concurrency, use_cache=False) as client:
+        count = 0
+        async for _ in query_many(prompts, concurrency=concurrency, client=client):
+            count += 1
+    return count
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark TheMealDB bulk lookups against a local stand-in")
+    parser.add_argument("--requests", type=int, default=400, help="Number of dish lookups per run")
+    parser.add_argument("--delay", type=float, default=0.05, help="Stand-in latency per request in seconds")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--base-url", type=str, default=None,
+                        help="Benchmark this server instead of starting the local stand-in")
+    args = parser.parse_args()
+
+    base_url = args.base_url
+    if base_url is None:
+        _, base_url = start_server(delay=args.delay)
+    prompts = [f"how to cook dish {i}" for i in range(args.requests)]
+
+    # Synchronous baseline: one pooled request at a time
+    themealdb_api.configure_cache(enabled=False)
+    themealdb_api.configure_client(base_url=base_url)
+    n = min(args.requests, 50)
+    start = time.perf_counter()
+    for prompt in prompts[:n]:
+        themealdb_api.query_themealdb(prompt)
+    elapsed = time.perf_counter() - start
+    print(f"sync        : {n / elapsed:8.1f} req/s")
+
+    for concurrency in args.concurrency:
+        start = time.perf_counter()
+        count = asyncio.run(run_bulk(prompts, concurrency, base_url))
+        elapsed = time.perf_counter() - start
+        print(f"async c={concurrency:<4}: {count / elapsed:8.1f} req/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import argparse
+import time
+
+from src.core.dish_catalog import DISH_INDEX_PATH, DishIndex, load_dish_labels
+from src.core.label_bank import encode_texts, model_revision
+from src.core.vlm import CLIP_MODEL_NAME, use_clip
+
+def main():
+    parser = argparse.ArgumentParser(description="Embed the dish label catalog with CLIP and build its search index")
+    parser.add_argument("--index", choices=["auto", "flat", "ivf"], default="auto",
+                        help="Index type (auto: IVF for large catalogs)")
+    parser.add_argument("--n-lists", type=int, default=None, help="IVF clusters (default 4*sqrt(labels))")
+    parser.add_argument("--n-probe", type=int, default=8, help="IVF clusters searched per image")
+    parser.add_argument("--labels", type=str, default=None, help="Extra labels, one per line")
+    parser.add_argument("--output", type=str, default=DISH_INDEX_PATH)
+    args = parser.parse_args()
+
+    extra = []
+    if args.labels:
+        with open(args.labels, 'r', encoding='utf-8') as f:
+            extra = [line.strip() for line in f if line.strip()]
+    labels = load_dish_labels(extra)
+    print(f"{len(labels)} labels")
+
+    with use_clip() as (model, processor):
+        start = time.perf_counter()
+        embeddings = encode_texts(model, processor, labels)
+        print(f"Embedded in {time.perf_counter() - start:.1f}s")
+
+        index_kwargs = {}
+        if args.index != "flat":
+            index_kwargs = {"n_lists": args.n_lists, "n_probe": args.n_probe}
+        index = DishIndex.build(labels, embeddings, float(model.logit_scale.exp().item()), CLIP_MODEL_NAME,
+                                model_revision(model), index_type=args.index, **index_kwargs)
+    index.save(args.output)
+    print(f"Saved {index.index.kind} index to {args.output}")
+
+if __name__ == "__main__":
+    main()
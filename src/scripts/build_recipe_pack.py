@@ -0,0 +1,20 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import argparse
+from src.core.recipe_store import RECIPE_DIR, PACK_PATH, INDEX_PATH, build_recipe_pack
+
+def main():
+    parser = argparse.ArgumentParser(description="Pack data/recipes/*.txt into one memory-mapped recipe store")
+    parser.add_argument("--recipe-dir", type=str, default=RECIPE_DIR, help="Directory of <dish_name>.txt files")
+    parser.add_argument("--pack", type=str, default=PACK_PATH, help="Output data file")
+    parser.add_argument("--index", type=str, default=INDEX_PATH, help="Output offset/length index")
+    args = parser.parse_args()
+
+    count = build_recipe_pack(args.recipe_dir, args.pack, args.index)
+    print(f"Packed {count} recipes into {args.pack} (index: {args.index})")
+
+
+if __name__ == "__main__":
+    main()
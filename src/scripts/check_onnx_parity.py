@@ -0,0 +1,79 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import argparse
+import difflib
+import multiprocessing
+import resource
+import time
+
+from src.scripts.benchmark_recipe_generator import load_prompts, percentile
+
+# (label, RecipeGenerator backend, quantize)
+VARIANTS = [("pytorch", "pytorch", False), ("onnx", "onnx", False), ("onnx-int8", "onnx", True)]
+
+def run_variant(backend, quantize, prompts, repeat, threads):
+    """Runs in a fresh process so peak RSS belongs to this backend alone."""
+    if threads:
+        import torch
+        torch.set_num_threads(threads)
+    from src.core.custom_llm import RecipeGenerator
+
+    start = time.perf_counter()
+    generator = RecipeGenerator(backend=backend, quantize=quantize, use_cache=False)
+    load_time = time.perf_counter() - start
+
+    outputs = [generator.generate_recipe(prompt) for prompt in prompts]  # also warms up
+    latencies = []
+    for _ in range(repeat):
+        for prompt in prompts:
+            start = time.perf_counter()
+            generator.generate_recipe(prompt)
+            latencies.append(time.perf_counter() - start)
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak_rss_mb = peak_rss / 2**20 if sys.platform == "darwin" else peak_rss / 1024
+    return outputs, load_time, latencies, peak_rss_mb
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare ONNX Runtime (fp32/int8) against the PyTorch T5 backend")
+    parser.add_argument("--repeat", type=int, default=2, help="Timed passes over the prompts")
+    parser.add_argument("--threads", type=int, default=None, help="Intra-op threads for PyTorch")
+    parser.add_argument("--variants", nargs="+", default=[v[0] for v in VARIANTS],
+                        choices=[v[0] for v in VARIANTS])
+    args = parser.parse_args()
+
+    prompts = load_prompts()
+    context = multiprocessing.get_context("spawn")
+    results = {}
+    for label, backend, quantize in VARIANTS:
+        if label not in args.variants:
+            continue
+        with context.Pool(1) as pool:
+            results[label] = pool.apply(run_variant, (backend, quantize, prompts, args.repeat, args.threads))
+
+    print(f"{'variant':>10} {'load s':>7} {'mean ms':>8} {'p95 ms':>8} {'peak RSS MB':>12}")
+    for label, (_, load_time, latencies, rss) in results.items():
+        print(f"{label:>10} {load_time:7.1f} {sum(latencies) / len(latencies) * 1000:8.0f} "
+              f"{percentile(latencies, 95) * 1000:8.0f} {rss:12.0f}")
+
+    reference = results.get("pytorch")
+    if reference is None:
+        return
+    for label, (outputs, _, _, _) in results.items():
+        if label == "pytorch":
+            continue
+        exact = sum(a == b for a, b in zip(reference[0], outputs))
+        similarity = [difflib.SequenceMatcher(None, a, b).ratio() for a, b in zip(reference[0], outputs)]
+        print(f"{label}: {exact}/{len(prompts)} identical to pytorch, "
+              f"min text similarity {min(similarity):.3f}")
+        for prompt, a, b in zip(prompts, reference[0], outputs):
+            if a != b:
+                title = prompt.splitlines()[0]
+                print(f"  differs on '{title}':")
+                for line in difflib.unified_diff(a.splitlines(), b.splitlines(), "pytorch", label, lineterm="", n=0):
+                    print(f"    {line}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import argparse
+import json
+import time
+
+from src.core.image_cache import configure_image_cache, image_cache_stats
+from src.core.vlm import infer_dishes_from_images, list_images
+
+def main():
+    parser = argparse.ArgumentParser(description="Classify folders of dish photos with CLIP (BLIP for uncertain ones) into JSONL")
+    parser.add_argument("paths", nargs="+", help="Image files or directories (searched recursively)")
+    parser.add_argument("--output", type=str, default=None, help="JSONL file to write (default: stdout)")
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--workers", type=int, default=None, help="Decode/preprocess threads")
+    parser.add_argument("--no-blip", action="store_true", help="Skip BLIP captions for low-confidence images")
+    parser.add_argument("--persist-cache", action="store_true", help="Keep results in data/cache/image_results.sqlite")
+    args = parser.parse_args()
+
+    if args.persist_cache:
+        configure_image_cache(persist=True)
+    paths = list_images(args.paths)
+    out = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+
+    start = time.perf_counter()
+    count = 0
+    try:
+        for result in infer_dishes_from_images(paths, batch_size=args.batch_size, workers=args.workers,
+                                               caption_uncertain=not args.no_blip):
+            out.write(json.dumps(result, ensure_ascii=False) + "\n")
+            out.flush()
+            count += 1
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    elapsed = time.perf_counter() - start
+    print(f"{count} images in {elapsed:.1f}s ({count / elapsed if elapsed else 0:.1f} images/s)", file=sys.stderr)
+    print(f"cache: {image_cache_stats()}", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
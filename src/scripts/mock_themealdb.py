@@ -0,0 +1,98 @@
+"""
+Local stand-in for TheMealDB, for testing and benchmarking the client offline.
+
+Run:  python src/scripts/mock_themealdb.py --port 8765 --delay 0.05
+Then: THEMEALDB_BASE_URL=http://127.0.0.1:8765/api/json/v1/1 python src/stacked_gui/app.py
+
+search.php?s=<name> returns one synthetic meal named after the query, except
+for names containing "unknown", which return {"meals": null} like the real API.
+search.php?f=<letter> returns two synthetic meals starting with that letter.
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+API_PREFIX = "/api/json/v1/1/"
+
+def make_meal(name, meal_id=52000):
+    """Build a meal dict with the same keys as a real TheMealDB search result."""
+    meal = {
+        "idMeal": str(meal_id),
+        "strMeal": name.title(),
+        "strCategory": "Miscellaneous",
+        "strArea": "Unknown",
+        "strInstructions": f"Prepare the {name}.\r\nCook until done.\r\nServe hot.",
+    }
+    ingredients = [("Salt", "1 tsp"), ("Pepper", "1/2 tsp"), ("Olive Oil", "2 tbsp"), (name.title(), "500g")]
+    for i in range(1, 21):
+        ingredient, measure = ingredients[i - 1] if i <= len(ingredients) else ("", "")
+        meal[f"strIngredient{i}"] = ingredient
+        meal[f"strMeasure{i}"] = measure
+    return meal
+
+class MockTheMealDBHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+    disable_nagle_algorithm = True
+    delay = 0.0
+    request_count = 0
+    count_lock = threading.Lock()
+
+    def do_GET(self):
+        with self.count_lock:
+            type(self).request_count += 1
+        url = urlparse(self.path)
+        params = parse_qs(url.query, keep_blank_values=True)
+        if self.delay:
+            time.sleep(self.delay)
+
+        if url.path == API_PREFIX + "search.php" and "s" in params:
+            name = params.get("s", [""])[0]
+            meals = None if (not name or "unknown" in name.lower()) else [make_meal(name)]
+            self._send_json(200, {"meals": meals})
+        elif url.path == API_PREFIX + "search.php" and "f" in params:
+            letter = params["f"][0][:1].lower()
+            base_id = 53000 + (ord(letter) - ord("a")) * 10 if letter.isalpha() else 53900
+            meals = [make_meal(f"{letter}{suffix} stew", base_id + i) for i, suffix in enumerate(("ow", "ap"))]
+            self._send_json(200, {"meals": meals})
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_server(host="127.0.0.1", port=0, delay=0.0):
+    """Start the stand-in on a background thread. Returns (server, base_url)."""
+    handler = type("Handler", (MockTheMealDBHandler,), {"delay": delay, "request_count": 0})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}{API_PREFIX.rstrip('/')}"
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a local stand-in for TheMealDB")
+    parser.add_argument("--host", type=str, default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--delay", type=float, default=0.0, help="Artificial latency per request in seconds")
+    args = parser.parse_args()
+
+    server, base_url = start_server(args.host, args.port, args.delay)
+    print(f"Mock TheMealDB serving at {base_url} (Ctrl+C to stop)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
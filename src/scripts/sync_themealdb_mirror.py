@@ -0,0 +1,30 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import argparse
+import string
+
+from src.core.themealdb_mirror import MIRROR_PATH, MealMirror
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or refresh the local TheMealDB mirror")
+    parser.add_argument("--db", type=str, default=MIRROR_PATH, help="Mirror SQLite file")
+    parser.add_argument("--dump", type=str, nargs="*", default=[],
+                        help="JSON dump files or directories to import ({\"meals\": [...]})")
+    parser.add_argument("--refresh", action="store_true", help="Fetch meals from the live API by first letter")
+    parser.add_argument("--letters", type=str, default=string.ascii_lowercase,
+                        help="First letters to refresh (default: a-z)")
+    args = parser.parse_args()
+
+    mirror = MealMirror(args.db)
+    for path in args.dump:
+        print(f"Imported {mirror.import_dump(path)} meals from {path}")
+    if args.refresh:
+        print(f"Refreshed {mirror.refresh(args.letters)} meals from TheMealDB")
+    print(f"Mirror {args.db} now holds {len(mirror)} meals")
+    mirror.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,7 @@ app.py
 Router-based Tkinter app that stacks pages in a single Tk() and supports Back navigation.
 Run:  python app.py
 """
+import startup_report  # first, so its clock starts with the app
 import tkinter as tk
 from tkinter import ttk
 from pages import ModeSelectionPage, InputTypePage, TextPage, SpeechPage, ImagePage, LLMParametersPage, MLLMPage
@@ -37,6 +38,7 @@ class App(tk.Tk):
 
         # Start at main page
         self.show("ModeSelectionPage", remember=False)
+        self.after_idle(startup_report.mark, "first_window")
 
     def show(self, name, *, remember=True, **kwargs):
         target = self.pages[name]
@@ -5,8 +5,12 @@ Fixes "No module named 'src'" by searching upward for a 'src' directory and
 adding its parent to sys.path at runtime. Then imports your real modules.
 """
 
-import sys, os
+import sys
+import threading
 from pathlib import Path
+from typing import Iterator
+
+import startup_report
 
 # --- Locate a nearby 'src' directory and add its parent to sys.path ---------
 _THIS = Path(__file__).resolve()
@@ -19,26 +23,30 @@ for base in candidates:
 
 # --- Now import your real backends (adjust module paths if needed) -----------
 try:
-    from src.core.nlu import find_dish_in_text
-    from src.core.knowledge import get_recipe
+    from src.core.nlu import match_dish, get_phrase_matcher
+    from src.core.knowledge import get_recipe, warm_recipe_cache
+    from src.core.search import search_recipes, get_search_index
+    from src.core.ingredients import find_recipes_by_ingredients, parse_ingredient_query
     from src.core.themealdb_api import query_themealdb
-    from src.core.custom_llm import generate_recipe_from_ingredients
+    from src.core.custom_llm import generate_recipe_from_ingredients, stream_recipe_from_ingredients, get_recipe_generator
     from src.core.vlm import infer_dish_from_image
-    from src.core.llm_adapter import gpt4all_model_list, LLMInterface
+    from src.core.llm_adapter import LLMInterface
+    from src.core.model_registry import get_registry
     from src.core.mllm import MLLMInterface, infer_dish_from_image
-    from gpt4all import GPT4All
 except ModuleNotFoundError as e:
     # As a convenience, also try without the 'src.' prefix in case your package
     # is installed directly as 'core'.
     try:
-        from core.nlu import find_dish_in_text
-        from core.knowledge import get_recipe
+        from core.nlu import match_dish, get_phrase_matcher
+        from core.knowledge import get_recipe, warm_recipe_cache
+        from core.search import search_recipes, get_search_index
+        from core.ingredients import find_recipes_by_ingredients, parse_ingredient_query
         from core.themealdb_api import query_themealdb
-        from core.custom_llm import generate_recipe_from_ingredients
+        from core.custom_llm import generate_recipe_from_ingredients, stream_recipe_from_ingredients, get_recipe_generator
         from core.vlm import infer_dish_from_image
         from core.mllm import MLLMInterface, infer_dish_from_image
-        from gpt4all import GPT4All
-        from src.core.llm_adapter import gpt4all_model_list, LLMInterface
+        from src.core.llm_adapter import LLMInterface
+        from core.model_registry import get_registry
     except ModuleNotFoundError:
         raise ImportError(
             "Could not import your backend modules. Make sure either:\n"
@@ -48,10 +56,81 @@ except ModuleNotFoundError as e:
             "If your package name is different, update the import lines in backend.py accordingly."
         ) from e
 
+# Number of recipes to pre-load into the recipe cache when the recipe mode is picked
+RECIPE_CACHE_WARM_TOP_N = 50
+# Minimum BM25 score for a full-text hit to be answered from the recipe dataset
+SEARCH_MIN_SCORE = 2.0
+# A dataset recipe replaces T5 generation only when it matches at least this many listed
+# ingredients, all of them, and at least this share of the recipe's own ingredients
+COVERING_MIN_INGREDIENTS = 2
+COVERING_MIN_RECIPE_COVERAGE = 0.5
+startup_report.mark("backend_imported")
+
+def _load_gpt4all():
+    """Import gpt4all on first use; it loads the llama.cpp runtime, which slows startup."""
+    try:
+        from gpt4all import GPT4All
+    except ImportError:
+        return None
+    return GPT4All
+
+# Model loading and a dummy request for each mode, run in the background once the mode is picked
+def _warm_existing_recipe():
+    get_phrase_matcher()
+    try:
+        warm_recipe_cache(top_n=RECIPE_CACHE_WARM_TOP_N)
+    except OSError as e:
+        print(f"[backend] Could not pre-warm recipe cache: {e}")
+    get_search_index()
+
+def _warm_custom_model():
+    get_recipe_generator().warm_up()
+
+_WARMUPS = {
+    "existing_recipe": _warm_existing_recipe,
+    "custom_model": _warm_custom_model,
+}
+_warmup_threads = {}
+_warmup_lock = threading.Lock()
+
+def warm_up_mode(mode: str):
+    """Start loading what `mode` needs on a daemon thread (once per mode). Returns the thread, if any."""
+    warm = _WARMUPS.get(mode)
+    if warm is None:
+        return None
+    with _warmup_lock:
+        if mode in _warmup_threads:
+            return _warmup_threads[mode]
+
+        def run():
+            try:
+                warm()
+                startup_report.mark(f"warmup_done:{mode}")
+            except Exception as e:
+                print(f"[backend] Warm-up for '{mode}' failed: {e}")
+
+        thread = _warmup_threads[mode] = threading.Thread(target=run, daemon=True)
+        thread.start()
+        return thread
+
 _gpt4all_instance = None
+# GPT4All model each interface keeps pinned in the registry for as long as it exists
+_gpt4all_pins = {}
+_gpt4all_pin_lock = threading.Lock()
+
+def _pin_gpt4all(interface: str, model_name: str, GPT4All):
+    """Acquire the model for `interface` and release the one its previous instance held."""
+    model = get_registry().acquire("gpt4all", model_name, lambda: GPT4All(model_name))
+    with _gpt4all_pin_lock:
+        previous = _gpt4all_pins.get(interface)
+        _gpt4all_pins[interface] = model_name
+    if previous is not None:
+        get_registry().release("gpt4all", previous)
+    return model
 
 def _get_gpt4all_instance(app_state=None):
     global _gpt4all_instance
+    GPT4All = _load_gpt4all()
     if GPT4All is None or LLMInterface is None:
         raise RuntimeError("GPT4All or LLMInterface not available")
 
@@ -62,7 +141,8 @@ def _get_gpt4all_instance(app_state=None):
     print(f"DEBUG: Using GPT4All model: {model_name}")
 
     try:
-        model = GPT4All(model_name)  # This will download if not found
+        # Loaded once per model name, shared by both interfaces and pinned while they use it; downloads if not found
+        model = _pin_gpt4all("llm", model_name, GPT4All)
     except Exception as e:
         raise RuntimeError(f"Failed to load or download GPT4All model '{model_name}': {e}")
 
@@ -85,6 +165,7 @@ def _get_gpt4all_instance(app_state=None):
 
 def _get_mllm_instance(app_state=None):
     global _mllm_instance
+    GPT4All = _load_gpt4all()
     if GPT4All is None or MLLMInterface is None:
         raise RuntimeError("GPT4All or MLLMInterface not available")
 
@@ -96,7 +177,8 @@ def _get_mllm_instance(app_state=None):
     print(f"DEBUG: Using GPT4All model for MLLM: {model_name}")
 
     try:
-        model = GPT4All(model_name)  # This will download if not found
+        # Loaded once per model name, shared by both interfaces and pinned while they use it; downloads if not found
+        model = _pin_gpt4all("mllm", model_name, GPT4All)
     except Exception as e:
         raise RuntimeError(f"Failed to load or download GPT4All model '{model_name}': {e}")
 
@@ -117,17 +199,45 @@ def _get_mllm_instance(app_state=None):
     )
     return _mllm_instance
 
+def _covering_recipe(user_text: str):
+    """
+    Name of a dataset recipe that closely matches the listed ingredients, if
+    any: it must contain every one of them (at least COVERING_MIN_INGREDIENTS)
+    and they must make up most of its own ingredient list.
+    """
+    items = parse_ingredient_query(user_text)
+    if len(items) < COVERING_MIN_INGREDIENTS:
+        return None
+    for match in find_recipes_by_ingredients(items):
+        if (match["source"] == "recipes" and match["coverage"] == 1.0
+                and match["recipe_coverage"] >= COVERING_MIN_RECIPE_COVERAGE):
+            return match["name"]
+    return None
+
 def generate_bot_reply(mode: str, user_text: str, *, app_state: dict = None, image_path: str = None) -> str:
     """Route to your real backends based on selected mode."""
+    reply = _generate_bot_reply(mode, user_text, app_state=app_state, image_path=image_path)
+    startup_report.mark("first_reply")
+    return reply
+
+def _generate_bot_reply(mode: str, user_text: str, *, app_state: dict = None, image_path: str = None) -> str:
     mode = (mode or "").strip() or "existing_recipe"
     if mode == "existing_recipe":
-        dish = find_dish_in_text(user_text)
+        dish = match_dish(user_text)
         if dish:
             return get_recipe(dish)
+        # Fall back to searching recipe bodies (e.g. "something with coconut milk")
+        results = search_recipes(user_text, k=1)
+        if results and results[0][1] >= SEARCH_MIN_SCORE:
+            return get_recipe(results[0][0])
         return "Sorry, I couldn't find a matching recipe."
     elif mode == "themealdb":
         return query_themealdb(user_text)
     elif mode == "custom_model":
+        # Answer from the recipe dataset when one recipe closely matches the listed ingredients
+        dish = _covering_recipe(user_text)
+        if dish:
+            return get_recipe(dish)
         return generate_recipe_from_ingredients(user_text)
     elif mode == "llm_interface":
         try:
@@ -144,6 +254,26 @@ def generate_bot_reply(mode: str, user_text: str, *, app_state: dict = None, ima
     else:
         return f"[{mode}] {user_text}"
 
+def stream_bot_reply(mode: str, user_text: str, *, app_state: dict = None, image_path: str = None) -> Iterator[str]:
+    """
+    Like generate_bot_reply, but yields the reply in pieces that join with "\n".
+    The custom model yields each recipe line as soon as it is generated; other
+    modes yield their whole reply at once.
+    """
+    mode = (mode or "").strip() or "existing_recipe"
+    if mode == "custom_model":
+        dish = _covering_recipe(user_text)
+        if dish:
+            yield get_recipe(dish)
+        else:
+            for i, line in enumerate(stream_recipe_from_ingredients(user_text)):
+                if i == 0:
+                    startup_report.mark("first_reply_line")
+                yield line
+        startup_report.mark("first_reply")
+        return
+    yield generate_bot_reply(mode, user_text, app_state=app_state, image_path=image_path)
+
 
 def speak_text(text: str) -> bool:
     """Speak text via pyttsx3 if available. Returns True if spoken, False otherwise."""
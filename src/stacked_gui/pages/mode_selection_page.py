@@ -1,5 +1,7 @@
 from tkinter import ttk
 from .base_page import BasePage
+from backend import warm_up_mode
+import startup_report
 
 class ModeSelectionPage(BasePage):
     def __init__(self, parent, app):
@@ -20,6 +22,9 @@ class ModeSelectionPage(BasePage):
 
         def go(mode):
             self.app.state["mode"] = mode
+            startup_report.mark("mode_selected")
+            # Load the mode's models in the background while the user picks an input type
+            warm_up_mode(mode)
             if mode == "llm_interface" or mode == "mllm_interface":
                 self.app.show("LLMParametersPage", mode=mode)
             else:
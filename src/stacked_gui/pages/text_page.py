@@ -1,7 +1,7 @@
 import tkinter as tk
 from tkinter import ttk, scrolledtext, messagebox
 from .base_page import BasePage
-from backend import generate_bot_reply
+from backend import generate_bot_reply, stream_bot_reply
 import pyttsx3
 from threading import Thread
 
@@ -41,6 +41,7 @@ class TextPage(BasePage):
         self._last_reply = None
         self.speaking = False
         self.engine = None
+        self.streaming = False
 
     def on_show(self, **_):
         mode = self.app.state.get("mode") or "—"
@@ -55,12 +56,18 @@ class TextPage(BasePage):
 
     def on_submit(self):
         text = self.input.get("1.0", tk.END).strip()
-        if not text:
+        if not text or self.streaming:
             return
         self.input.delete("1.0", tk.END)
         self.add_msg("You", text, "user")
 
         mode = self.app.state.get("mode")
+        if mode == "custom_model":
+            # Show the generated recipe line by line instead of waiting for all of it
+            self.streaming = True
+            self._append_bot("Bot: ")
+            Thread(target=self._stream_run, args=(mode, text), daemon=True).start()
+            return
         if mode == "llm_interface":
             reply = generate_bot_reply(mode, text, app_state=self.app.state)
         else:
@@ -70,6 +77,30 @@ class TextPage(BasePage):
         self.speak_btn.state(["!disabled"])
         self.speak_btn.config(text="🔊 Speak")
 
+    def _append_bot(self, text):
+        self.chat.config(state="normal")
+        self.chat.insert(tk.END, text, "bot")
+        self.chat.config(state="disabled")
+        self.chat.yview(tk.END)
+
+    def _stream_run(self, mode, text):
+        lines = []
+        try:
+            for line in stream_bot_reply(mode, text):
+                self.after(0, self._append_bot, ("\n" if lines else "") + line)
+                lines.append(line)
+        except Exception as e:
+            self.after(0, self._append_bot, ("\n" if lines else "") + f"Error: {e}")
+            lines.append(f"Error: {e}")
+        self.after(0, self._finish_stream, "\n".join(lines))
+
+    def _finish_stream(self, reply):
+        self._append_bot("\n")
+        self.streaming = False
+        self._last_reply = reply
+        self.speak_btn.state(["!disabled"])
+        self.speak_btn.config(text="🔊 Speak")
+
     def on_speak(self):
         if not self._last_reply:
             return
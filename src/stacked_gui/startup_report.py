@@ -0,0 +1,44 @@
+"""
+startup_report.py
+Records how long the app takes to reach startup milestones (backend imported,
+first window shown, first reply, model warm-ups), measured from when app.py
+starts. Set RECIPE_STARTUP_REPORT=1 to print the report at exit and append it
+to data/cache/startup_times.jsonl so runs can be compared over time.
+"""
+import atexit
+import json
+import os
+import threading
+import time
+
+START = time.perf_counter()
+ENABLED = os.environ.get("RECIPE_STARTUP_REPORT", "").lower() in ("1", "true", "yes")
+REPORT_FILE = os.path.join(os.path.dirname(__file__), '..', '..', 'data', 'cache', 'startup_times.jsonl')
+
+_marks = {}
+_lock = threading.Lock()
+
+def mark(event: str):
+    """Record the first time `event` happens, in seconds since app start."""
+    elapsed = time.perf_counter() - START
+    with _lock:
+        _marks.setdefault(event, elapsed)
+
+def report() -> dict:
+    with _lock:
+        return dict(sorted(_marks.items(), key=lambda item: item[1]))
+
+def _write_report():
+    marks = report()
+    print("Startup timings (s since app start):")
+    for event, elapsed in marks.items():
+        print(f"  {elapsed:8.3f}  {event}")
+    try:
+        os.makedirs(os.path.dirname(REPORT_FILE), exist_ok=True)
+        with open(REPORT_FILE, 'a', encoding='utf-8') as f:
+            f.write(json.dumps({"time": time.time(), "marks": marks}) + "\n")
+    except OSError as e:
+        print(f"[startup_report] Could not save report: {e}")
+
+if ENABLED:
+    atexit.register(_write_report)